@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from time import monotonic
 from learner import Learner
-from timeout import timeout
 from base_board import Player
 from move import Move, PlayerResigned
 from abc import ABCMeta, abstractmethod
@@ -135,11 +135,11 @@ class AutonomousAgent(Agent):
         """
         print("Thinking... ")
 
+        # The searcher stops itself at the deadline, so a stale clock
+        # interrupt can't cut it off in the middle of a table write.
         try:
-            with timeout(max_time):
-                self._searcher.search(self._game.to_game_state())
-        except TimeoutError:
-            pass
+            self._searcher.search(self._game.to_game_state(),
+                                  deadline=monotonic() + max_time)
         except KeyboardInterrupt:
             if self._resigns:
                 raise PlayerResigned
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import random
 from enum import Enum
 from abc import ABCMeta, abstractmethod
 from move import Direction, Move, InvalidMove
@@ -14,6 +15,128 @@ class Player(Enum):
     black = 1
 
 
+# Each player's opponent, precomputed so turn flips are a dict lookup
+# instead of an Enum construction.
+OPPONENT = {
+    Player.none: Player.none,
+    Player.white: Player.black,
+    Player.black: Player.white
+}
+
+
+# Side-to-move keys folded into a board's Zobrist hash when hashing a
+# position together with whose turn it is.
+TURN_KEY = {
+    Player.none: 0x9E3779B97F4A7C15,
+    Player.white: 0,
+    Player.black: 0xC2B2AE3D27D4EB4F
+}
+
+
+def _generate_direction_tables(width, height):
+    """Generates shift tables producing all moves of a direction at once.
+
+    Shifting a player's whole bitboard one step and masking off occupied
+    cells and row wrap-arounds leaves the destinations of every legal
+    move in that direction, so generation runs in a handful of integer
+    operations per direction instead of per piece. Each destination cell
+    maps back to a shared Move instance for its origin.
+
+    Args:
+        width: Width of the board in number of cells.
+        height: Height of the board in number of cells.
+
+    Returns:
+        Tuple of (shift, whether to shift left, destination mask, Move
+        per destination cell) entries, one per direction.
+    """
+    size = width * height
+    full = (1 << size) - 1
+    first_column = 0
+    last_column = 0
+    for y in range(height):
+        first_column |= 1 << (y * width)
+        last_column |= 1 << (y * width + width - 1)
+
+    tables = []
+    for direction, shift, left, mask in (
+            (Direction.east, 1, True, full & ~first_column),
+            (Direction.west, 1, False, full & ~last_column),
+            (Direction.south, width, True, full),
+            (Direction.north, width, False, full)):
+        moves = []
+        for dest in range(size):
+            origin = dest - shift if left else dest + shift
+            if (mask >> dest) & 1 and 0 <= origin < size:
+                y, x = divmod(origin, width)
+                moves.append(Move(x, y, direction))
+            else:
+                moves.append(None)
+        tables.append((shift, left, mask, tuple(moves)))
+    return tuple(tables)
+
+
+def _generate_streak_kernels(width, height):
+    """Generates shift kernels detecting any run of three in one pass.
+
+    A player's pieces ANDed with themselves shifted by one and two steps
+    of a direction leave a bit set exactly where a run of three starts,
+    so a win check is three shifts and two ANDs per direction instead of
+    a scan over every winning mask. The masks keep horizontal and
+    diagonal runs from wrapping between rows.
+
+    Args:
+        width: Width of the board in number of cells.
+        height: Height of the board in number of cells.
+
+    Returns:
+        Tuple of (first shift, second shift, valid start cells mask)
+        triples, one per direction.
+    """
+    full = (1 << (width * height)) - 1
+    row = (1 << width) - 1
+    not_right_pair = 0
+    not_left_pair = 0
+    for y in range(height):
+        not_right_pair |= (row >> 2) << (y * width)
+        not_left_pair |= ((row >> 2) << 2) << (y * width)
+    return ((1, 2, not_right_pair),
+            (width, 2 * width, full),
+            (width + 1, 2 * (width + 1), not_right_pair),
+            (width - 1, 2 * (width - 1), not_left_pair))
+
+
+def _mirror_keys(keys, width):
+    """Reindexes a Zobrist key table under a horizontal board flip.
+
+    Args:
+        keys: Tuple of per-cell Zobrist keys.
+        width: Width of the board in number of cells.
+
+    Returns:
+        Tuple where each cell holds the key of its horizontal mirror.
+    """
+    return tuple(keys[i - (i % width) + (width - 1 - i % width)]
+                 for i in range(len(keys)))
+
+
+def _generate_zobrist_keys(size):
+    """Generates Zobrist keys for each (player, cell) pair.
+
+    The generator is seeded so keys are identical across runs and across
+    worker processes.
+
+    Args:
+        size: Number of cells on the board.
+
+    Returns:
+        Tuple of (white keys, black keys), one 64-bit key per cell.
+    """
+    rng = random.Random(0x5EED)
+    return (tuple(rng.getrandbits(64) for _ in range(size)),
+            tuple(rng.getrandbits(64) for _ in range(size)))
+
+
 class Board(object, metaclass=ABCMeta):
 
     """Game board.
@@ -30,12 +153,39 @@ class Board(object, metaclass=ABCMeta):
 
     WIDTH = 0
     HEIGHT = 0
-    WINNING_BOARDS = set()
+    _ZOBRIST = None
+    _ZOBRIST_M = None
+    _DIRECTIONS = None
+    _STREAKS = None
+
+    def __init_subclass__(cls, **kwargs):
+        """Populates a concrete board class's lookup tables.
+
+        Unpickling skips __init__, so a worker process that receives a
+        pickled board without ever constructing one still needs the
+        tables ready. Generating them as the class is defined makes any
+        process that can import the class agree on them: the generators
+        are deterministic and the Zobrist keys seeded.
+        """
+        super().__init_subclass__(**kwargs)
+        if cls.WIDTH and cls.HEIGHT:
+            cls._ZOBRIST = _generate_zobrist_keys(cls.WIDTH * cls.HEIGHT)
+            cls._ZOBRIST_M = tuple(_mirror_keys(keys, cls.WIDTH)
+                                   for keys in cls._ZOBRIST)
+            cls._DIRECTIONS = _generate_direction_tables(cls.WIDTH,
+                                                         cls.HEIGHT)
+            cls._STREAKS = _generate_streak_kernels(cls.WIDTH, cls.HEIGHT)
 
     def __init__(self):
         "Constructs a Board with the specified width and height. """
         self._white_pieces = 0
         self._black_pieces = 0
+        self._zhash = 0
+
+        # Hash of the horizontally mirrored position, maintained in step
+        # with _zhash so a canonical key over both reflections is a min()
+        # away instead of a bit permutation.
+        self._zhash_m = 0
 
     def __str__(self):
         """Returns a string representation of the game board."""
@@ -92,15 +242,28 @@ class Board(object, metaclass=ABCMeta):
             player: Player.
         """
         index = x + y * self.WIDTH
+        bit = 1 << index
+        white_keys, black_keys = self._ZOBRIST
+        white_keys_m, black_keys_m = self._ZOBRIST_M
+
+        # Hash out whichever piece currently occupies the cell.
+        if self._white_pieces & bit:
+            self._white_pieces &= ~bit
+            self._zhash ^= white_keys[index]
+            self._zhash_m ^= white_keys_m[index]
+        elif self._black_pieces & bit:
+            self._black_pieces &= ~bit
+            self._zhash ^= black_keys[index]
+            self._zhash_m ^= black_keys_m[index]
+
         if player == Player.white:
-            self._white_pieces |= 1 << index
-            self._black_pieces &= ~(1 << index)
+            self._white_pieces |= bit
+            self._zhash ^= white_keys[index]
+            self._zhash_m ^= white_keys_m[index]
         elif player == Player.black:
-            self._white_pieces &= ~(1 << index)
-            self._black_pieces |= 1 << index
-        else:
-            self._white_pieces &= ~(1 << index)
-            self._black_pieces &= ~(1 << index)
+            self._black_pieces |= bit
+            self._zhash ^= black_keys[index]
+            self._zhash_m ^= black_keys_m[index]
 
     def available_moves(self, player):
         """Yields all available moves for a given player.
@@ -119,19 +282,17 @@ class Board(object, metaclass=ABCMeta):
         else:
             raise ValueError("Only white and black players can move")
 
-        max_width, max_height = self.WIDTH - 1, self.HEIGHT - 1
-        for x in range(self.WIDTH):
-            for y in range(self.HEIGHT):
-                index = x + y * self.WIDTH
-                if (pieces >> index) & 1:
-                    if x != 0 and self.get(x - 1, y) == Player.none:
-                        yield Move(x, y, Direction.west)
-                    if x != max_width and self.get(x + 1, y) == Player.none:
-                        yield Move(x, y, Direction.east)
-                    if y != 0 and self.get(x, y - 1) == Player.none:
-                        yield Move(x, y, Direction.north)
-                    if y != max_height and self.get(x, y + 1) == Player.none:
-                        yield Move(x, y, Direction.south)
+        # Shift the whole bitboard per direction: what survives the
+        # wrap-around mask and the occupancy is the destination of a
+        # legal move, which maps straight back to its Move instance.
+        free = ~(self._white_pieces | self._black_pieces)
+        for shift, left, mask, moves in self._DIRECTIONS:
+            dests = (pieces << shift if left else pieces >> shift)
+            dests &= mask & free
+            while dests:
+                lsb = dests & -dests
+                dests ^= lsb
+                yield moves[lsb.bit_length() - 1]
 
     def move(self, move):
         """Moves a piece on the board in place.
@@ -154,15 +315,79 @@ class Board(object, metaclass=ABCMeta):
             raise InvalidMove("Reached bottom edge of board")
 
         # Move.
+        dx, dy = move.delta
         self.set(move.x, move.y, Player.none)
-        if move.direction == Direction.north:
-            self.set(move.x, move.y - 1, current_cell)
-        elif move.direction == Direction.south:
-            self.set(move.x, move.y + 1, current_cell)
-        elif move.direction == Direction.east:
-            self.set(move.x + 1, move.y, current_cell)
-        elif move.direction == Direction.west:
-            self.set(move.x - 1, move.y, current_cell)
+        self.set(move.x + dx, move.y + dy, current_cell)
+
+    def _recompute_zhash(self):
+        """Recomputes the Zobrist hash from the piece bitboards.
+
+        Only needed when the bitboards are assigned directly instead of
+        going through set(), which maintains the hash incrementally.
+        """
+        zhash = 0
+        zhash_m = 0
+        for keys, keys_m, pieces in zip(
+                self._ZOBRIST, self._ZOBRIST_M,
+                (self._white_pieces, self._black_pieces)):
+            while pieces:
+                index = (pieces & -pieces).bit_length() - 1
+                zhash ^= keys[index]
+                zhash_m ^= keys_m[index]
+                pieces &= pieces - 1
+        self._zhash = zhash
+        self._zhash_m = zhash_m
+
+    def apply(self, move):
+        """Applies a legal move in place and returns a record to undo it.
+
+        Unlike move(), this performs no validation and allocates no new
+        board, so a search can descend into a move and backtrack on a
+        single board. Only moves yielded by available_moves should be
+        applied.
+
+        Args:
+            move: Move to apply.
+
+        Returns:
+            Record to pass to undo().
+        """
+        dx, dy = move.delta
+        from_index = move.x + move.y * self.WIDTH
+        to_index = (move.x + dx) + (move.y + dy) * self.WIDTH
+        mask = (1 << from_index) | (1 << to_index)
+        if (self._white_pieces >> from_index) & 1:
+            keys = self._ZOBRIST[0]
+            keys_m = self._ZOBRIST_M[0]
+            zdelta = keys[from_index] ^ keys[to_index]
+            zdelta_m = keys_m[from_index] ^ keys_m[to_index]
+            self._white_pieces ^= mask
+            self._zhash ^= zdelta
+            self._zhash_m ^= zdelta_m
+            return (Player.white, mask, zdelta, zdelta_m)
+        else:
+            keys = self._ZOBRIST[1]
+            keys_m = self._ZOBRIST_M[1]
+            zdelta = keys[from_index] ^ keys[to_index]
+            zdelta_m = keys_m[from_index] ^ keys_m[to_index]
+            self._black_pieces ^= mask
+            self._zhash ^= zdelta
+            self._zhash_m ^= zdelta_m
+            return (Player.black, mask, zdelta, zdelta_m)
+
+    def undo(self, record):
+        """Undoes a move previously applied with apply().
+
+        Args:
+            record: Record returned by apply().
+        """
+        player, mask, zdelta, zdelta_m = record
+        if player == Player.white:
+            self._white_pieces ^= mask
+        else:
+            self._black_pieces ^= mask
+        self._zhash ^= zdelta
+        self._zhash_m ^= zdelta_m
 
     def is_goal(self, player):
         """Returns whether the current board is the given player's goal or not.
@@ -178,8 +403,28 @@ class Board(object, metaclass=ABCMeta):
         else:
             raise ValueError("Only white or black can win")
 
-        for b in self.WINNING_BOARDS:
-            if (b & pieces) == b:
+        for shift, shift2, mask in self._STREAKS:
+            if pieces & (pieces >> shift) & (pieces >> shift2) & mask:
                 return True
 
         return False
+
+    def winner(self):
+        """Returns which player has formed a winning streak, if any.
+
+        Returns:
+            Player.white or Player.black if they have won, and Player.none
+            otherwise.
+        """
+        white = self._white_pieces
+        black = self._black_pieces
+
+        # White takes precedence should both players somehow streak.
+        for shift, shift2, mask in self._STREAKS:
+            if white & (white >> shift) & (white >> shift2) & mask:
+                return Player.white
+        for shift, shift2, mask in self._STREAKS:
+            if black & (black >> shift) & (black >> shift2) & mask:
+                return Player.black
+
+        return Player.none
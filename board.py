@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 from base_board import Board, Player
-from streaking_boards import generate_winning_boards
 
 
 class SmallBoard(Board):
@@ -10,7 +9,6 @@ class SmallBoard(Board):
 
     WIDTH = 5
     HEIGHT = 4
-    WINNING_BOARDS = None
 
     def __init__(self, _white_pieces=None, _black_pieces=None):
         """Constructs a SmallBoard with all pieces in the correct starting
@@ -40,20 +38,13 @@ class SmallBoard(Board):
         else:
             self._black_pieces = _black_pieces
 
+        if _white_pieces is not None or _black_pieces is not None:
+            self._recompute_zhash()
+
     def copy(self):
         """Returns a deep copy of the board."""
         return SmallBoard(self._white_pieces, self._black_pieces)
 
-    def is_goal(self, player):
-        """Returns whether the current board is the given player's goal or not.
-
-        Args:
-            player: Player to check for.
-        """
-        if SmallBoard.WINNING_BOARDS is None:
-            SmallBoard.WINNING_BOARDS = generate_winning_boards(SmallBoard)
-        return super().is_goal(player)
-
 
 class LargeBoard(Board):
 
@@ -61,7 +52,6 @@ class LargeBoard(Board):
 
     WIDTH = 7
     HEIGHT = 6
-    WINNING_BOARDS = None
 
     def __init__(self, _white_pieces=None, _black_pieces=None):
         """Constructs a LargeBoard with all pieces in the correct starting
@@ -91,16 +81,9 @@ class LargeBoard(Board):
         else:
             self._black_pieces = _black_pieces
 
+        if _white_pieces is not None or _black_pieces is not None:
+            self._recompute_zhash()
+
     def copy(self):
         """Returns a deep copy of the board."""
         return LargeBoard(self._white_pieces, self._black_pieces)
-
-    def is_goal(self, player):
-        """Returns whether the current board is the given player's goal or not.
-
-        Args:
-            player: Player to check for.
-        """
-        if LargeBoard.WINNING_BOARDS is None:
-            LargeBoard.WINNING_BOARDS = generate_winning_boards(LargeBoard)
-        return super().is_goal(player)
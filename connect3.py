@@ -11,7 +11,8 @@ from collections import Counter
 from heuristics import WeightedHeuristic
 from board import SmallBoard, LargeBoard
 from agent import HumanAgent, AutonomousAgent
-from search import AlphaBetaPrunedMinimaxSearch, MinimaxSearch
+from search import (AlphaBetaPrunedMinimaxSearch, MinimaxSearch,
+                    ParallelMinimaxSearch)
 from game_connector import LocalGameConnector, RemoteGameConnector
 
 
@@ -24,6 +25,8 @@ def _get_searcher(args):
     Returns:
         Searcher to use.
     """
+    if args.parallel:
+        return ParallelMinimaxSearch
     if args.no_alpha_beta:
         return MinimaxSearch
     return AlphaBetaPrunedMinimaxSearch
@@ -50,7 +53,8 @@ def _get_transposition_table(args):
     if args.db:
         filename = args.db
 
-    return transposition_table.PermanentTranspositionTable(filename)
+    return transposition_table.PermanentTranspositionTable(filename,
+                                                           args.board)
 
 
 def _get_weighted_heuristics(args):
@@ -63,13 +67,13 @@ def _get_weighted_heuristics(args):
         List of weighted heuristics.
     """
     wh = [
-        WeightedHeuristic(heuristics.GoalHeuristic, 100),
-        WeightedHeuristic(heuristics.DistanceToCenterHeuristic, 5),
-        WeightedHeuristic(heuristics.NumberOfRunsOfTwoHeuristic, 1)
+        WeightedHeuristic(heuristics.compute_goal, 100),
+        WeightedHeuristic(heuristics.compute_distance_to_center, 5),
+        WeightedHeuristic(heuristics.compute_runs_of_two, 1)
     ]
 
     if args.random:
-        wh.append(WeightedHeuristic(heuristics.RandomHeuristic, 0.1))
+        wh.append(WeightedHeuristic(heuristics.compute_random, 0.1))
 
     return wh
 
@@ -155,8 +159,7 @@ def train(args):
 
         """Training game connector."""
 
-        @asyncio.coroutine
-        def start(self, board_class):
+        async def start(self, board_class):
             """Starts a game asynchronously.
 
             Args:
@@ -180,7 +183,7 @@ def train(args):
                                                   False)
                     connector = LocalGameConnector(white_agent, black_agent,
                                                    max_time, args.learn)
-                    yield from connector.start(board_class)
+                    await connector.start(board_class)
 
                     winners.update([connector.winner])
 
@@ -211,7 +214,6 @@ def play_vs_remote(args):
     Returns:
         Game connector.
     """
-    loop = asyncio.get_event_loop()
     if args.human:
         agent = HumanAgent(args.player)
     else:
@@ -219,7 +221,7 @@ def play_vs_remote(args):
                                 _get_transposition_table(args),
                                 _get_searcher(args), args.max_depth)
     return RemoteGameConnector(agent, args.max_time, args.learn, args.id,
-                               args.hostname, args.port, loop)
+                               args.hostname, args.port)
 
 
 def parse_args():
@@ -245,6 +247,9 @@ def parse_args():
         subparser.add_argument("--no-alpha-beta", default=False,
                                action="store_true",
                                help="don't use alpha-beta pruning")
+        subparser.add_argument("--parallel", default=False,
+                               action="store_true",
+                               help="search root moves on all CPUs")
         subparser.add_argument("--max-depth", default=None, type=int,
                                help="limit search depth")
         subparser.add_argument("--no-db", default=False, action="store_true",
@@ -306,7 +311,4 @@ def parse_args():
 if __name__ == "__main__":
     args = parse_args()
     connector = args.func(args)
-
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(connector.start(args.board))
-    loop.close()
+    asyncio.run(connector.start(args.board))
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from move import InvalidMove
-from base_board import Player
+from base_board import OPPONENT, TURN_KEY, Player
 from draw_tracker import DrawTracker
 
 
@@ -19,8 +19,22 @@ class GameState(object):
         """
         self.board = board
         self.turn = turn
-        self._next_turn = (Player.black if turn == Player.white else
-                           Player.white)
+        self._next_turn = OPPONENT[turn]
+
+        # Snapshot the piece bitboards and Zobrist hash so the state
+        # remains a stable dictionary key even if the underlying board is
+        # later mutated in place by apply/undo.
+        self._white_pieces = board._white_pieces
+        self._black_pieces = board._black_pieces
+        zhash = board._zhash
+        mirrored = board._zhash_m
+        turn_key = TURN_KEY[turn]
+        self._zhash = zhash ^ turn_key
+
+        # Canonical hash shared with the horizontally mirrored position.
+        # Mirrored positions are game-theoretically equivalent, so keying
+        # transposition entries by this doubles their effective hit rate.
+        self._chash = (zhash if zhash <= mirrored else mirrored) ^ turn_key
 
     def __eq__(self, other):
         """Returns whether two game states are equal or not.
@@ -31,8 +45,9 @@ class GameState(object):
         Returns:
             Whether the two game states are equivalent or not.
         """
-        return (self.board._white_pieces == other.board._white_pieces and
-                self.board._black_pieces == other.board._black_pieces and
+        return (self._zhash == other._zhash and
+                self._white_pieces == other._white_pieces and
+                self._black_pieces == other._black_pieces and
                 self.turn == other.turn)
 
     def __hash__(self):
@@ -41,9 +56,7 @@ class GameState(object):
         Returns:
             Hashed value.
         """
-        return hash((self.board._white_pieces,
-                     self.board._black_pieces,
-                     self.turn))
+        return self._zhash
 
     def compute_heuristic(self, weighted_heuristics):
         """Computes the weighted heuristic for the game state given.
@@ -60,18 +73,13 @@ class GameState(object):
         """
         heuristic = 0
         for wh in weighted_heuristics:
-            v = wh.heuristic.compute(self.board, self.turn)
+            v = wh.heuristic(self.board, self.turn)
             heuristic += wh.weight * v
         return heuristic
 
     def won_by(self):
         """Returns who won the current game state."""
-        if self.board.is_goal(Player.white):
-            return Player.white
-        elif self.board.is_goal(Player.black):
-            return Player.black
-        else:
-            return Player.none
+        return self.board.winner()
 
     def next_states(self):
         """Yields all possible next states.
@@ -137,7 +145,7 @@ class Game(object):
         if self.board.is_goal(self.turn):
             self.won = self.turn
 
-        self.turn = Player(not self.turn.value)
+        self.turn = OPPONENT[self.turn]
         self.draw = self._draw_tracker.update(self.board, self.turn)
 
         if self.won != Player.none or self.draw:
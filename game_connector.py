@@ -29,8 +29,7 @@ class GameConnector(object, metaclass=ABCMeta):
         """Returns the winner of the game."""
         return self._winner
 
-    @asyncio.coroutine
-    def start(self, board_class):
+    async def start(self, board_class):
         """Starts a game asynchronously.
 
         Args:
@@ -39,7 +38,7 @@ class GameConnector(object, metaclass=ABCMeta):
         game = Game(board_class())
 
         try:
-            yield from self.setup(game)
+            await self.setup(game)
         except ConnectionException:
             return
 
@@ -47,7 +46,7 @@ class GameConnector(object, metaclass=ABCMeta):
             self.on_turn(game.board, game.turn)
 
             try:
-                move = yield from self.request_move(game.turn)
+                move = await self.request_move(game.turn)
                 game.play(move)
             except PlayerResigned:
                 self.on_resignation(game.turn)
@@ -56,7 +55,7 @@ class GameConnector(object, metaclass=ABCMeta):
                 self.on_invalid_move(e.message)
                 continue
 
-            yield from self.on_successful_move(move)
+            await self.on_successful_move(move)
 
         if game.won != Player.none:
             self._winner = game.won
@@ -64,11 +63,10 @@ class GameConnector(object, metaclass=ABCMeta):
         elif game.draw:
             self.on_draw(game.board)
 
-        yield from self.teardown()
+        await self.teardown()
 
     @abstractmethod
-    @asyncio.coroutine
-    def setup(self, game):
+    async def setup(self, game):
         """Sets up game before it starts.
 
         Args:
@@ -80,14 +78,12 @@ class GameConnector(object, metaclass=ABCMeta):
         raise NotImplementedError
 
     @abstractmethod
-    @asyncio.coroutine
-    def teardown(self):
+    async def teardown(self):
         """Tears down game once it ends."""
         raise NotImplementedError
 
     @abstractmethod
-    @asyncio.coroutine
-    def request_move(self, turn) -> Move:
+    async def request_move(self, turn) -> Move:
         """Requests a move from the given player.
 
         Args:
@@ -99,8 +95,7 @@ class GameConnector(object, metaclass=ABCMeta):
         raise NotImplementedError
 
     @abstractmethod
-    @asyncio.coroutine
-    def on_successful_move(self, move):
+    async def on_successful_move(self, move):
         """Called when a move has been validated.
 
         Should be used to update the game state.
@@ -180,8 +175,7 @@ class LocalGameConnector(GameConnector):
 
         super().__init__()
 
-    @asyncio.coroutine
-    def setup(self, game):
+    async def setup(self, game):
         """Sets up game before it starts.
 
         Args:
@@ -190,13 +184,11 @@ class LocalGameConnector(GameConnector):
         self._white_agent.play(game.copy())
         self._black_agent.play(game.copy())
 
-    @asyncio.coroutine
-    def teardown(self):
+    async def teardown(self):
         """Tears down game once it ends."""
         pass
 
-    @asyncio.coroutine
-    def request_move(self, turn):
+    async def request_move(self, turn):
         """Requests a move from the given player.
 
         Args:
@@ -212,8 +204,7 @@ class LocalGameConnector(GameConnector):
         else:
             raise NotImplementedError
 
-    @asyncio.coroutine
-    def on_successful_move(self, move):
+    async def on_successful_move(self, move):
         """Called when a move has been validated.
 
         Args:
@@ -255,7 +246,7 @@ class RemoteGameConnector(GameConnector):
 
     BUFFERSIZE = 1024
 
-    def __init__(self, agent, max_time, learn, game_id, hostname, port, loop):
+    def __init__(self, agent, max_time, learn, game_id, hostname, port):
         """Constructs a RemoteGameConnector using given agent as a local player..
 
         Args:
@@ -265,7 +256,6 @@ class RemoteGameConnector(GameConnector):
             game_id: Remote game ID.
             hostname: Hostname of remote server.
             port: Port of remote server.
-            loop: Event loop.
         """
         self._agent = agent
         self._max_time = max_time
@@ -274,15 +264,13 @@ class RemoteGameConnector(GameConnector):
         self._game_id = game_id
         self._hostname = hostname
         self._port = port
-        self._loop = loop
 
         self._reader = None
         self._writer = None
 
         super().__init__()
 
-    @asyncio.coroutine
-    def setup(self, game):
+    async def setup(self, game):
         """Sets up game before it starts.
 
         Args:
@@ -297,15 +285,14 @@ class RemoteGameConnector(GameConnector):
         sys.stdout.flush()
 
         # Connect to remote server.
-        transport = yield from asyncio.open_connection(self._hostname,
-                                                       self._port,
-                                                       loop=self._loop)
+        transport = await asyncio.open_connection(self._hostname,
+                                                  self._port)
         self._reader, self._writer = transport
 
         # Write header to connect to and start game.
         header = "{} {}\n".format(self._game_id, self._agent.player.name)
         self._writer.write(header.encode())
-        response = yield from self._reader.read(self.BUFFERSIZE)
+        response = await self._reader.read(self.BUFFERSIZE)
 
         if response.decode() == header:
             print("OK")
@@ -313,8 +300,7 @@ class RemoteGameConnector(GameConnector):
             print("ERROR: {}".format(response.decode().strip()))
             raise ConnectionException
 
-    @asyncio.coroutine
-    def teardown(self):
+    async def teardown(self):
         """Tears down game once it ends."""
         if self._writer:
             self._writer.close()
@@ -322,8 +308,7 @@ class RemoteGameConnector(GameConnector):
         self._writer = None
         self._reader = None
 
-    @asyncio.coroutine
-    def request_move(self, turn):
+    async def request_move(self, turn):
         """Requests a move from the given player.
 
         Args:
@@ -338,7 +323,7 @@ class RemoteGameConnector(GameConnector):
             # Forward agent's move to the server.
             encoded_move = "{}\n".format(move).encode()
             self._writer.write(encoded_move)
-            response = yield from self._reader.read(self.BUFFERSIZE)
+            response = await self._reader.read(self.BUFFERSIZE)
             if response != encoded_move:
                 print("ERROR: sent {}, received: {}".format(encoded_move,
                                                             response))
@@ -347,7 +332,7 @@ class RemoteGameConnector(GameConnector):
             while True:
                 print("Waiting for move... ", end="")
                 sys.stdout.flush()
-                encoded_move = yield from self._reader.read(self.BUFFERSIZE)
+                encoded_move = await self._reader.read(self.BUFFERSIZE)
                 if encoded_move is None or len(encoded_move) == 0:
                     print("Received empty response: {}".format(encoded_move))
                     continue
@@ -364,8 +349,7 @@ class RemoteGameConnector(GameConnector):
 
         return move
 
-    @asyncio.coroutine
-    def on_successful_move(self, move):
+    async def on_successful_move(self, move):
         """Called when a move has been validated.
 
         Args:
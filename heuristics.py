@@ -1,221 +1,330 @@
 # -*- coding: utf-8 -*-
 
 import random
-from math import isnan
-from base_board import Player
-from abc import ABCMeta, abstractmethod
-from streaking_boards import generate_streaking_boards
+from math import inf, isnan
+from base_board import TURN_KEY, Player
+from streaking_boards import (generate_streaking_boards,
+                              generate_streaking_board_groups)
 
-try:
-    from math import inf
-except ImportError:
-    inf = float("inf")
-
-
-class Heuristic(object, metaclass=ABCMeta):
-
-    """A heuristic."""
-
-    @classmethod
-    @abstractmethod
-    def compute(cls, board, player):
-        """Computes the heuristic's value for a given game state.
-
-        Args:
-            board: Current board.
-            player: Current player.
-
-        Returns:
-            The estimated value of the board such that the more positive it is
-            the more in favor of the white player the board is and the more
-            negative it is, the more in favor of the black player the board is.
-        """
-        raise NotImplementedError
+# Streak masks lazily generated from the first board type seen.
+_RUNS_OF_TWO_GROUPS = None
+_RUNS_OF_THREE_GROUPS = None
+_RUNS_OF_THREE = None
+_DISTANCE_TO_WIN = None
 
 
 class WeightedHeuristic(object):
 
-    """A heuristic and corresponding weight pairing.
+    """A heuristic function and corresponding weight pairing.
 
     Attributes:
-        heuristic: Heuristic.
-        weight: Correspoding weight.
+        heuristic: Heuristic function taking a board and a player.
+        weight: Corresponding weight.
     """
 
+    __slots__ = ('heuristic', 'weight')
+
     def __init__(self, heuristic, weight):
         """Constructs a WeightedHeuristic.
 
         Args:
-            heuristic: Heuristic.
+            heuristic: Heuristic function taking a board and a player.
             weight: Corresponding weight.
         """
         self.heuristic = heuristic
         self.weight = weight
 
 
-class GoalHeuristic(Heuristic):
+def _specialize_weighted_sum(heuristics, weights):
+    """Specializes the weighted heuristic sum into a straight-line function.
 
-    """A heuristic based on whether a player has won the game or not."""
+    Compiles a function of the form
 
-    @classmethod
-    def compute(cls, board, player):
-        """Computes the heuristic's value for a given game state.
+        w0 * h0(board, player) + w1 * h1(board, player) + ...
 
-        Args:
-            board: Current board.
-            player: Current player.
+    with the weights and heuristic functions bound as globals, so the
+    cache-miss path pays neither the iteration over pairs nor the
+    repeated accumulator stores of the generic loop.
 
-        Returns:
-            A white win is represented as +1000 and a black win is represented
-            as -1000. Anything else returns 0.
-        """
-        if board.is_goal(Player.white):
-            return 1000.0
-        elif board.is_goal(Player.black):
-            return -1000.0
+    Args:
+        heuristics: Tuple of heuristic functions.
+        weights: Tuple of corresponding weights.
 
-        return 0
+    Returns:
+        Function computing the weighted sum for a board and a player.
+    """
+    if not heuristics:
+        return lambda board, player: 0.0
 
+    terms = " + ".join("_w{0} * _h{0}(board, player)".format(i)
+                       for i in range(len(heuristics)))
+    namespace = {}
+    for i, (heuristic, weight) in enumerate(zip(heuristics, weights)):
+        namespace["_h{}".format(i)] = heuristic
+        namespace["_w{}".format(i)] = float(weight)
 
-class RandomHeuristic(Heuristic):
+    exec("def weighted_sum(board, player):\n    return " + terms, namespace)
+    return namespace["weighted_sum"]
 
-    """A heuristic based on randomness."""
 
-    @classmethod
-    def compute(cls, board, player):
-        """Computes the heuristic's value for a given game state.
+class HeuristicBundle(object):
 
-        Args:
-            board: Current board.
-            player: Current player.
+    """A structure-of-arrays bundle of heuristic functions and weights.
 
-        Returns:
-            A random number between -1 and 1.
-        """
-        return 2 * (random.random() - 0.5)
+    Keeping the functions and weights in two parallel tuples avoids the
+    per-element attribute loads of iterating WeightedHeuristic objects in
+    the evaluation loop.
 
+    Attributes:
+        heuristics: Tuple of heuristic functions.
+        weights: Tuple of corresponding weights.
+    """
 
-class NumberOfRunsOfTwoHeuristic(Heuristic):
+    # Positions memoized before the cache is dropped wholesale, so
+    # arbitrarily long runs don't grow it without bound.
+    CACHE_LIMIT = 1 << 20
 
-    """A heuristic based on the number of runs of 2 pieces.
+    def __init__(self, heuristics, weights):
+        """Constructs a HeuristicBundle.
 
-    H(n) = <# of runs of 2 white pieces> - <# of runs of 2 black pieces>
-    """
+        Args:
+            heuristics: Tuple of heuristic functions.
+            weights: Tuple of corresponding weights.
+        """
+        self.heuristics = tuple(heuristics)
+        self.weights = tuple(weights)
+        self._raw = _specialize_weighted_sum(self.heuristics, self.weights)
 
-    RUNS_OF_TWO = None
+        # Evaluations memoized by canonical position hash, bounded by
+        # CACHE_LIMIT, so mirrored positions share an entry. Heuristic
+        # values depend only on the position, so entries never go stale,
+        # and iterative deepening revisits the same shallow positions
+        # constantly.
+        self._cache = {}
 
     @classmethod
-    def compute(cls, board, player):
-        """Computes the heuristic's value for a given game state.
+    def from_weighted_heuristics(cls, weighted_heuristics):
+        """Constructs a HeuristicBundle from a list of weighted heuristics.
+
+        Args:
+            weighted_heuristics: List of weighted heuristics.
+
+        Returns:
+            HeuristicBundle.
+        """
+        return cls((wh.heuristic for wh in weighted_heuristics),
+                   (wh.weight for wh in weighted_heuristics))
+
+    def evaluate(self, board, player):
+        """Evaluates the weighted sum of all bundled heuristics.
 
         Args:
             board: Current board.
             player: Current player.
 
         Returns:
-            The number of runs of 2 the player is leading the black player by.
+            The estimated value of the board such that the more positive it is
+            the more in favor of the white player the board is and the more
+            negative it is, the more in favor of the black player the board is.
         """
-        if cls.RUNS_OF_TWO is None:
-            board_class = type(board)
-            cls.RUNS_OF_TWO = generate_streaking_boards(board_class, 2)
-
-        white_runs = 0
-        black_runs = 0
-        for b in cls.RUNS_OF_TWO:
-            if b & board._white_pieces == b:
-                white_runs += 1
-            if b & board._black_pieces == b:
-                black_runs += 1
+        zhash = board._zhash
+        mirrored = board._zhash_m
+        key = (zhash if zhash <= mirrored else mirrored) ^ TURN_KEY[player]
+        value = self._cache.get(key)
+        if value is None:
+            value = self._raw(board, player)
+            if len(self._cache) >= self.CACHE_LIMIT:
+                self._cache.clear()
+            self._cache[key] = value
+        return value
+
+    def evaluate_moves(self, state):
+        """Scores every available move of a game state in one pass.
+
+        Each move is applied to the board in place and evaluated for the
+        opponent to move, so the whole child list is scored in a single
+        tight loop with the compiled weighted sum and the board's
+        apply/undo bound once rather than looked up per child.
+
+        Args:
+            state: Game state to score the moves of.
 
-        return white_runs - black_runs
+        Returns:
+            List of (score, move) tuples.
+        """
+        raw = self._raw
+        cache = self._cache
+        cache_limit = self.CACHE_LIMIT
+        board = state.board
+        player = state._next_turn
+        turn_key = TURN_KEY[player]
+        apply_move = board.apply
+        undo_move = board.undo
+
+        scored = []
+        for move in board.available_moves(state.turn):
+            record = apply_move(move)
+            zhash = board._zhash
+            mirrored = board._zhash_m
+            key = (zhash if zhash <= mirrored else mirrored) ^ turn_key
+            value = cache.get(key)
+            if value is None:
+                value = raw(board, player)
+                if len(cache) >= cache_limit:
+                    cache.clear()
+                cache[key] = value
+            undo_move(record)
+            scored.append((value, move))
+        return scored
+
+
+def compute_goal(board, player):
+    """Computes a heuristic based on whether a player has won the game or not.
+
+    Args:
+        board: Current board.
+        player: Current player.
+
+    Returns:
+        A white win is represented as +1000 and a black win is represented
+        as -1000. Anything else returns 0.
+    """
+    winner = board.winner()
+    if winner is Player.white:
+        return 1000.0
+    elif winner is Player.black:
+        return -1000.0
+
+    return 0
 
 
-class DistanceToCenterHeuristic(Heuristic):
+def compute_random(board, player):
+    """Computes a heuristic based on randomness.
 
-    """A heuristic based on the distance from each piece to the center of the
-    board.
+    Args:
+        board: Current board.
+        player: Current player.
+
+    Returns:
+        A random number between -1 and 1.
     """
+    return 2 * (random.random() - 0.5)
 
-    @classmethod
-    def compute(cls, board, player):
-        """Computes the heuristic's value for a given game state.
 
-        Args:
-            board: Current board.
-            player: Current player.
+def compute_runs_of_two(board, player):
+    """Computes a heuristic based on the number of runs of 2 pieces.
 
-        Returns:
-            The difference between the sum of the distances of all black pieces
-            from the center minus the sum of the distances of all white pieces
-            from the center.
-        """
-        center_x = (board.WIDTH - 1) / 2
-        center_y = (board.HEIGHT - 1) / 2
-
-        white_distance = 0
-        black_distance = 0
-        for x in range(board.WIDTH):
-            for y in range(board.HEIGHT):
-                piece = board.get(x, y)
-                if piece == Player.none:
-                    continue
-
-                distance = abs(x - center_x) + abs(y - center_y)
-                if piece == Player.white:
-                    white_distance += distance
-                else:
-                    black_distance += distance
+    H(n) = <# of runs of 2 white pieces> - <# of runs of 2 black pieces>
 
-        return black_distance - white_distance
+    Args:
+        board: Current board.
+        player: Current player.
 
+    Returns:
+        The number of runs of 2 the white player is leading the black player
+        by.
+    """
+    global _RUNS_OF_TWO_GROUPS
+    if _RUNS_OF_TWO_GROUPS is None:
+        _RUNS_OF_TWO_GROUPS = generate_streaking_board_groups(type(board), 2)
+
+    white_pieces = board._white_pieces
+    black_pieces = board._black_pieces
+    all_pieces = white_pieces | black_pieces
+
+    white_runs = 0
+    black_runs = 0
+    for combined, masks in _RUNS_OF_TWO_GROUPS:
+        if combined & all_pieces == 0:
+            # No piece coincides with this orientation at all.
+            continue
+
+        for b in masks:
+            if b & white_pieces == b:
+                white_runs += 1
+            if b & black_pieces == b:
+                black_runs += 1
 
-class NumberOfMovesHeuristic(Heuristic):
+    return white_runs - black_runs
 
-    """Heuristic based on the number of available moves."""
 
-    @classmethod
-    def compute(cls, board, player):
-        """Computes the heuristic's value for a given game state.
+def compute_distance_to_center(board, player):
+    """Computes a heuristic based on the distance from each piece to the
+    center of the board.
 
-        Args:
-            board: Current board.
-            player: Current player.
+    Args:
+        board: Current board.
+        player: Current player.
 
-        Returns:
-            The difference between the number of available moves white can take
-            and black can take.
-        """
-        white_moves = len(list(board.available_moves(Player.white)))
-        black_moves = len(list(board.available_moves(Player.black)))
-        return white_moves - black_moves
+    Returns:
+        The difference between the sum of the distances of all black pieces
+        from the center minus the sum of the distances of all white pieces
+        from the center.
+    """
+    center_x = (board.WIDTH - 1) / 2
+    center_y = (board.HEIGHT - 1) / 2
 
+    white_distance = 0
+    black_distance = 0
+    for x in range(board.WIDTH):
+        for y in range(board.HEIGHT):
+            piece = board.get(x, y)
+            if piece == Player.none:
+                continue
 
-class NumberOfBlockedGoalsHeuristic(Heuristic):
+            distance = abs(x - center_x) + abs(y - center_y)
+            if piece == Player.white:
+                white_distance += distance
+            else:
+                black_distance += distance
 
-    """Heuristic based on the number of blocked goals."""
+    return black_distance - white_distance
 
-    RUNS_OF_THREE = None
 
-    @classmethod
-    def compute(cls, board, player):
-        """Computes the heuristic's value for a given game state.
+def compute_number_of_moves(board, player):
+    """Computes a heuristic based on the number of available moves.
 
-        Args:
-            board: Current board.
-            player: Current player.
+    Args:
+        board: Current board.
+        player: Current player.
 
-        Returns:
-            The difference between the number of blocked white wins and black
-            blocked wins.
-        """
-        if cls.RUNS_OF_THREE is None:
-            board_class = type(board)
-            cls.RUNS_OF_THREE = generate_streaking_boards(board_class, 3)
-
-        white_blocked = 0
-        black_blocked = 0
-        all_pieces = board._white_pieces | board._black_pieces
-        for win in cls.RUNS_OF_THREE:
+    Returns:
+        The difference between the number of available moves white can take
+        and black can take.
+    """
+    white_moves = len(list(board.available_moves(Player.white)))
+    black_moves = len(list(board.available_moves(Player.black)))
+    return white_moves - black_moves
+
+
+def compute_blocked_goals(board, player):
+    """Computes a heuristic based on the number of blocked goals.
+
+    Args:
+        board: Current board.
+        player: Current player.
+
+    Returns:
+        The difference between the number of blocked white wins and black
+        blocked wins.
+    """
+    global _RUNS_OF_THREE_GROUPS
+    if _RUNS_OF_THREE_GROUPS is None:
+        _RUNS_OF_THREE_GROUPS = generate_streaking_board_groups(type(board), 3)
+
+    all_pieces = board._white_pieces | board._black_pieces
+    if all_pieces.bit_count() < 3:
+        # Not enough pieces on the board to fill any run of three.
+        return 0
+
+    white_blocked = 0
+    black_blocked = 0
+    for combined, masks in _RUNS_OF_THREE_GROUPS:
+        if combined & all_pieces == 0:
+            # No piece coincides with this orientation at all.
+            continue
+
+        for win in masks:
             if win & all_pieces == win:
                 white_almost_win = win ^ board._white_pieces
                 if (white_almost_win & (white_almost_win - 1)) > 0:
@@ -224,25 +333,34 @@ class NumberOfBlockedGoalsHeuristic(Heuristic):
                 else:
                     black_blocked += 1
 
-        return white_blocked - black_blocked
+    return white_blocked - black_blocked
 
 
-class DistanceToGoalHeuristic(Heuristic):
+def _specialize_distance_kernel(board_class):
+    """Specializes the distance-to-win kernel for a given board type.
 
-    """Heuristic based on the number of moves to reach goal."""
+    The board dimensions and the index-to-location table are captured as
+    closure constants so the per-call coordinate arithmetic is evaluated
+    once per board type rather than once per bit.
 
-    RUNS_OF_TWO = None
-    RUNS_OF_THREE = None
+    Args:
+        board_class: Board class type.
 
-    @classmethod
-    def _distance_to_win(cls, pieces, opposite_pieces, run_of_three, board):
+    Returns:
+        Function computing the smallest number of moves for the given
+        pieces to complete the given run of three.
+    """
+    size = board_class.WIDTH * board_class.HEIGHT
+    locations = tuple((i % board_class.WIDTH, i % board_class.HEIGHT)
+                      for i in range(size))
+
+    def distance_to_win(pieces, opposite_pieces, run_of_three):
         """Computes the smallest number of moves to reach a winning goal.
 
         Args:
             pieces: Pieces to consider as an int.
             opposite_pieces: Opposing player's pieces as an int.
             run_of_three: Current run of three to consider.
-            board: Board to consider.
 
         Returns:
             Minimum number of moves to reach goal.
@@ -263,78 +381,83 @@ class DistanceToGoalHeuristic(Heuristic):
 
         movable_pieces_locations = set()
         destination_location = None
-        for i in range(board.WIDTH * board.HEIGHT):
+        for i in range(size):
             if (pieces_coinciding >> i) & 1:
-                x = i % board.WIDTH
-                y = i % board.HEIGHT
-                movable_pieces_locations.add((x, y))
+                movable_pieces_locations.add(locations[i])
             if destination_location is None:
                 if (destination >> i) & 1:
-                    x = i % board.WIDTH
-                    y = i % board.HEIGHT
-                    destination_location = (x, y)
+                    destination_location = locations[i]
 
         closest = inf
+        _abs = abs
+        destination_x, destination_y = destination_location
         for x, y in movable_pieces_locations:
-            dx = abs(x - destination_location[0])
-            dy = abs(y - destination_location[1])
-            closest = min(closest, dx + dy)
+            distance = _abs(x - destination_x) + _abs(y - destination_y)
+            if distance < closest:
+                closest = distance
 
         return closest
 
-    @classmethod
-    def compute(cls, board, player):
-        """Computes the heuristic's value for a given game state.
+    return distance_to_win
 
-        Args:
-            board: Current board.
-            player: Current player.
 
-        Returns:
-            The difference between the black's distance to winning and the
-            white's ditance to winning.
-        """
-        if cls.RUNS_OF_THREE is None:
-            board_class = type(board)
-            cls.RUNS_OF_THREE = generate_streaking_boards(board_class, 3)
-
-        white_distance = inf
-        black_distance = inf
-        for b in cls.RUNS_OF_THREE:
-            d = cls._distance_to_win(board._white_pieces, board._black_pieces,
-                                     b, board)
-            white_distance = min(d, white_distance)
-
-            d = cls._distance_to_win(board._black_pieces, board._white_pieces,
-                                     b, board)
-            black_distance = min(d, black_distance)
-
-        value = black_distance - white_distance
-        if isnan(value):
-            return 0
+def compute_distance_to_goal(board, player):
+    """Computes a heuristic based on the number of moves to reach goal.
+
+    Args:
+        board: Current board.
+        player: Current player.
 
-        return black_distance - white_distance
+    Returns:
+        The difference between the black's distance to winning and the
+        white's ditance to winning.
+    """
+    global _RUNS_OF_THREE, _DISTANCE_TO_WIN
+    if _RUNS_OF_THREE is None:
+        _RUNS_OF_THREE = generate_streaking_boards(type(board), 3)
+        _DISTANCE_TO_WIN = _specialize_distance_kernel(type(board))
+
+    white_pieces = board._white_pieces
+    black_pieces = board._black_pieces
+    if white_pieces.bit_count() < 2 and black_pieces.bit_count() < 2:
+        # Neither player has enough pieces to coincide with any run.
+        return 0
 
+    all_pieces = white_pieces | black_pieces
+    white_distance = inf
+    black_distance = inf
+    for b in _RUNS_OF_THREE:
+        if b & all_pieces == 0:
+            # No pieces coincide with this run at all.
+            continue
 
-class TurnHeuristic(Heuristic):
+        d = _DISTANCE_TO_WIN(white_pieces, black_pieces, b)
+        white_distance = min(d, white_distance)
 
-    """Heuristic based on who's turn it is."""
+        d = _DISTANCE_TO_WIN(black_pieces, white_pieces, b)
+        black_distance = min(d, black_distance)
 
-    @classmethod
-    def compute(cls, board, player):
-        """Computes the heuristic's value for a given game state.
+    value = black_distance - white_distance
+    if isnan(value):
+        return 0
 
-        Args:
-            board: Current board.
-            player: Current player.
+    return black_distance - white_distance
 
-        Returns:
-            1 if it's the white player's turn.
-            -1 if it's the black player's turn.
-        """
-        if player == Player.white:
-            return 1
-        elif player == Player.black:
-            return -1
-        else:
-            raise NotImplementedError
+
+def compute_turn(board, player):
+    """Computes a heuristic based on who's turn it is.
+
+    Args:
+        board: Current board.
+        player: Current player.
+
+    Returns:
+        1 if it's the white player's turn.
+        -1 if it's the black player's turn.
+    """
+    if player == Player.white:
+        return 1
+    elif player == Player.black:
+        return -1
+    else:
+        raise NotImplementedError
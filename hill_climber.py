@@ -2,6 +2,7 @@
 
 import random
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 import heuristics
 from board import SmallBoard
 from base_board import Player
@@ -12,6 +13,55 @@ from search import AlphaBetaPrunedMinimaxSearch
 from transposition_table import PermanentTranspositionTable
 
 
+# Fixed column order for population weight vectors. The goal heuristic's
+# weight is pinned to 1.0 and never perturbed.
+HEURISTIC_ORDER = (
+    heuristics.compute_distance_to_center,
+    heuristics.compute_goal,
+    heuristics.compute_runs_of_two,
+)
+_GOAL_INDEX = HEURISTIC_ORDER.index(heuristics.compute_goal)
+
+
+def random_weights():
+    """Generates a random weight vector in HEURISTIC_ORDER.
+
+    Returns:
+        Tuple of weights.
+    """
+    _random = random.random
+    return tuple(1.0 if i == _GOAL_INDEX else _random()
+                 for i in range(len(HEURISTIC_ORDER)))
+
+
+def perturb_weights(weights, prob):
+    """Randomly perturbs a weight vector in HEURISTIC_ORDER.
+
+    Args:
+        weights: Tuple of weights to perturb.
+        prob: Probability of each weight being perturbed.
+
+    Returns:
+        New tuple of weights.
+    """
+    _random = random.random
+    return tuple(w if i == _GOAL_INDEX or prob <= _random() else _random()
+                 for i, w in enumerate(weights))
+
+
+def weights_to_heuristics(weights):
+    """Converts a weight vector to a list of weighted heuristics.
+
+    Args:
+        weights: Tuple of weights in HEURISTIC_ORDER.
+
+    Returns:
+        List of weighted heuristics.
+    """
+    return [WeightedHeuristic(h, w)
+            for h, w in zip(HEURISTIC_ORDER, weights)]
+
+
 def generate_random_heuristics(heuristics_list):
     """Generates a list of heuristics with random weights.
 
@@ -21,89 +71,345 @@ def generate_random_heuristics(heuristics_list):
     Returns:
         List of randomly weighted heuristics.
     """
-    weighted_heuristics = []
-    for h in heuristics_list:
-        if h == heuristics.GoalHeuristic:
-            weight = 1.0
-        else:
-            weight = random.random()
-        weighted_heuristics.append(WeightedHeuristic(h, weight))
-
-    return weighted_heuristics
+    _random = random.random
+    return [WeightedHeuristic(h, 1.0 if h == heuristics.compute_goal
+                              else _random())
+            for h in heuristics_list]
 
 
 def perturb(weighted_heuristics, prob):
-    child = []
-    for wh in weighted_heuristics:
-        weight = wh.weight
-        if wh.heuristic != heuristics.GoalHeuristic and prob > random.random():
-            weight = random.random()
-        child.append(WeightedHeuristic(wh.heuristic, weight))
+    """Randomly perturbs the weights of a list of weighted heuristics.
+
+    The goal heuristic's weight is pinned and never perturbed.
+
+    Args:
+        weighted_heuristics: List of weighted heuristics to perturb.
+        prob: Probability of each weight being perturbed.
 
-    return child
+    Returns:
+        New list of weighted heuristics.
+    """
+    _random = random.random
+    compute_goal = heuristics.compute_goal
+    return [WeightedHeuristic(wh.heuristic,
+                              _random()
+                              if (wh.heuristic != compute_goal and
+                                  prob > _random())
+                              else wh.weight)
+            for wh in weighted_heuristics]
 
 
-@asyncio.coroutine
-def play(white_heuristics, black_heuristics, board, max_time):
+async def play(white_heuristics, black_heuristics, board, max_time):
     searcher = AlphaBetaPrunedMinimaxSearch
-    transposition_table = PermanentTranspositionTable("hill_climber.db")
+    transposition_table = PermanentTranspositionTable("hill_climber.db",
+                                                      board)
     white_agent = AutonomousAgent(Player.white, white_heuristics,
                                   transposition_table, searcher, resigns=False)
     black_agent = AutonomousAgent(Player.black, black_heuristics,
                                   transposition_table, searcher, resigns=False)
     connector = LocalGameConnector(white_agent, black_agent, max_time, True)
-    yield from connector.start(board)
+    try:
+        await connector.start(board)
+    finally:
+        # Long-lived workers play many games: release the connection and
+        # the preloaded cache instead of letting them pile up.
+        transposition_table.close()
     return connector.winner
 
 
+def _play_sync(white_heuristics, black_heuristics, board, max_time):
+    """Plays a single game to completion inside a worker process.
+
+    Args:
+        white_heuristics: List of weighted heuristics for white.
+        black_heuristics: List of weighted heuristics for black.
+        board: Board class to play on.
+        max_time: Max time for an agent to come up with a move in seconds.
+
+    Returns:
+        Player who won the game.
+    """
+    return asyncio.run(play(white_heuristics, black_heuristics, board,
+                            max_time))
+
+
+# Outcome of a two-game series keyed by each game's winner: +1 if the
+# first child won the series and -1 if the second child did. Any other
+# result is a draw.
+_SERIES_OUTCOME = {
+    (Player.white, Player.white): 1,
+    (Player.white, Player.black): 1,
+    (Player.white, Player.none): 1,
+    (Player.none, Player.black): 1,
+    (Player.black, Player.black): -1,
+    (Player.black, Player.white): -1,
+    (Player.black, Player.none): -1,
+}
+
+# Winners of already played matchups keyed by (players, board, max_time).
+_outcome_cache = {}
+
+# Stable ids for packing heuristic functions into compact cache keys.
+_HEURISTIC_IDS = {
+    heuristics.compute_blocked_goals: 0,
+    heuristics.compute_distance_to_center: 1,
+    heuristics.compute_distance_to_goal: 2,
+    heuristics.compute_goal: 3,
+    heuristics.compute_number_of_moves: 4,
+    heuristics.compute_random: 5,
+    heuristics.compute_runs_of_two: 6,
+    heuristics.compute_turn: 7,
+}
+
+
+def _pack_heuristics(weighted_heuristics):
+    """Packs a list of weighted heuristics into a compact bytes key.
+
+    Each heuristic packs to two bytes: its id and its weight quantized to
+    8 bits. That resolution is plenty since the weights are sampled
+    uniformly and game outcomes are noisy, and hashing a short bytes key
+    is much cheaper than hashing nested tuples of functions and floats.
+
+    Args:
+        weighted_heuristics: List of weighted heuristics.
+
+    Returns:
+        Packed bytes key.
+    """
+    packed = bytearray()
+    for wh in weighted_heuristics:
+        packed.append(_HEURISTIC_IDS[wh.heuristic])
+        packed.append(min(255, int(wh.weight * 255)))
+    return bytes(packed)
+
+
+def _matchup_key(white_heuristics, black_heuristics, board, max_time):
+    """Computes a hashable key identifying a matchup.
+
+    Args:
+        white_heuristics: List of weighted heuristics for white.
+        black_heuristics: List of weighted heuristics for black.
+        board: Board class to play on.
+        max_time: Max time for an agent to come up with a move in seconds.
+
+    Returns:
+        Hashable key.
+    """
+    return (_pack_heuristics(white_heuristics),
+            _pack_heuristics(black_heuristics),
+            board, max_time)
+
+
+def _play_on_pool(white_heuristics, black_heuristics, board, max_time, pool,
+                  loop):
+    """Schedules a game on the worker pool, reusing identical matchups.
+
+    The searches are deterministic for a given matchup and time budget, so
+    replaying one recomputes the same game. The future of each matchup is
+    cached so identical matchups, including concurrently scheduled ones,
+    share a single game.
+
+    Args:
+        white_heuristics: List of weighted heuristics for white.
+        black_heuristics: List of weighted heuristics for black.
+        board: Board class to play on.
+        max_time: Max time for an agent to come up with a move in seconds.
+        pool: Worker pool to play games on.
+        loop: Event loop.
+
+    Returns:
+        Future resolving to the player who won the game.
+    """
+    key = _matchup_key(white_heuristics, black_heuristics, board, max_time)
+    game = _outcome_cache.get(key)
+    if game is None:
+        game = loop.run_in_executor(pool, _play_sync, white_heuristics,
+                                    black_heuristics, board, max_time)
+        _outcome_cache[key] = game
+    return game
+
+
 def _format_heuristics(weighted_heuristics):
     return [(wh.heuristic.__name__, wh.weight)
             for wh in weighted_heuristics]
 
-@asyncio.coroutine
-def climb(first_heuristics, second_heuristics, board, generations=100,
-          perturbations=0.25):
 
-    first_child = first_heuristics
-    second_child = second_heuristics
+async def tournament(population, board, max_time, pool, loop):
+    """Plays a full round-robin tournament between all candidates.
 
-    first_wins_most = [
-        (Player.white, Player.black),
-        (Player.white, Player.none),
-        (Player.none, Player.black)
-    ]
+    All pairings are dispatched to the worker pool as one batch so the
+    games run in parallel instead of generation by generation.
 
-    second_wins_most = [
-        (Player.black, Player.white),
-        (Player.black, Player.none),
-        (Player.none, Player.black)
-    ]
+    Args:
+        population: List of candidate weighted heuristic lists.
+        board: Board class to play on.
+        max_time: Max time for an agent to come up with a move in seconds.
+        pool: Worker pool to play games on.
+        loop: Event loop.
+
+    Returns:
+        List of wins per candidate.
+    """
+    pairs = [(i, j)
+             for i in range(len(population))
+             for j in range(len(population))
+             if i != j]
+    games = [_play_on_pool(population[i], population[j], board, max_time,
+                           pool, loop)
+             for i, j in pairs]
+    winners = await asyncio.gather(*games)
+
+    wins = [0] * len(population)
+    for (i, j), winner in zip(pairs, winners):
+        if winner == Player.white:
+            wins[i] += 1
+        elif winner == Player.black:
+            wins[j] += 1
+
+    return wins
+
+
+async def evolve(population, board, generations=100, perturbations=0.25, keep=2):
+    """Evolves a population of weight vectors by tournament selection.
+
+    The population is kept as plain weight tuples in HEURISTIC_ORDER so
+    selection and perturbation work on flat vectors, and rows are only
+    converted to weighted heuristics at the play boundary. Each generation
+    plays a round-robin tournament, keeps the candidates with the most
+    wins and refills the population by perturbing the survivors.
+
+    Args:
+        population: List of candidate weight vectors in HEURISTIC_ORDER.
+        board: Board class to play on.
+        generations: Number of generations to evolve for.
+        perturbations: Probability of each weight being perturbed.
+        keep: Number of top candidates to keep per generation.
+
+    Returns:
+        The best weight vector found.
+    """
+    loop = asyncio.get_running_loop()
+    pool = ProcessPoolExecutor()
+    max_time = 1
+    try:
+        for gen in range(generations):
+            print("Generation {}:".format(gen))
+            for weights in population:
+                print("  {}".format(weights))
+
+            candidates = [weights_to_heuristics(w) for w in population]
+            wins = await tournament(candidates, board, max_time, pool,
+                                         loop)
+            ranked = sorted(zip(wins, range(len(population))), reverse=True)
+            survivors = [population[i] for _, i in ranked[:keep]]
+
+            if all(w == 0 for w in wins):
+                # All draws so play again but increase the thought time.
+                max_time += 1
+                print("All draws. Increasing max time to {} seconds."
+                      .format(max_time))
+                continue
+
+            population = list(survivors)
+            while len(population) < len(wins):
+                for survivor in survivors:
+                    if len(population) == len(wins):
+                        break
+                    population.append(perturb_weights(survivor,
+                                                      perturbations))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown()
+
+    print(population[0])
+    return population[0]
+
+
+def _mutation_probability(start, generation, stagnation, decay=0.95):
+    """Computes an annealed mutation probability.
+
+    The probability starts high and cools with each generation, but heats
+    back up the longer the leader goes unbeaten so the search can escape
+    local optima.
+
+    Args:
+        start: Starting mutation probability.
+        generation: Current generation.
+        stagnation: Number of generations the leader has gone unbeaten.
+        decay: Cooling factor per generation.
+
+    Returns:
+        Mutation probability between 0.05 and 1.
+    """
+    return min(1.0, max(0.05, start * decay ** generation +
+                        0.05 * stagnation))
+
+
+async def climb(first_heuristics, second_heuristics, board, generations=100,
+          perturbations=0.25, restart_after=10, pool=None):
+    """Climbs by playing two candidates against each other head-to-head.
+
+    The two games of each generation are awaited together so they run
+    concurrently instead of back to back. The mutation probability anneals
+    over generations and rises again with stagnation, and a leader that
+    goes unbeaten too long gets a freshly randomized opponent.
+
+    Args:
+        first_heuristics: First candidate's list of weighted heuristics.
+        second_heuristics: Second candidate's list of weighted heuristics.
+        board: Board class to play on.
+        generations: Number of generations to climb for.
+        perturbations: Starting probability of each weight being perturbed.
+        restart_after: Generations of stagnation before randomly restarting
+            the second candidate.
+        pool: Worker pool to play games on. A private one is created and
+            torn down if none is given.
+    """
+    first_child = first_heuristics
+    second_child = second_heuristics
 
     max_time = 1
+    stagnation = 0
+    loop = asyncio.get_running_loop()
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=2)
     try:
         for gen in range(generations):
             print("First child: {}".format(_format_heuristics(first_child)))
             print("Second child: {}".format(_format_heuristics(second_child)))
 
-            print("Playing first game...")
-            first_winner = yield from play(first_child, second_child,
-                                           board, max_time)
-
-            print("Playing second game...")
-            second_winner = yield from play(first_child, second_child,
-                                            board, max_time)
+            # The rematch is an identical matchup and would resolve to the
+            # same cached game, so its result is already decided by the
+            # first game and playing it is pure waste.
+            print("Playing game...")
+            winner = await _play_on_pool(first_child, second_child,
+                                              board, max_time, pool, loop)
 
-            results = (first_winner, second_winner)
+            results = (winner, winner)
+            outcome = _SERIES_OUTCOME.get(results, 0)
+            prob = _mutation_probability(perturbations, gen, stagnation)
 
-            if results in first_wins_most:
+            if outcome > 0:
                 # First child won most times so improve his opponent.
-                second_child = perturb(first_child, perturbations)
+                stagnation += 1
+                if stagnation >= restart_after:
+                    # Stuck on the same leader too long so restart the
+                    # opponent from scratch.
+                    heuristics_list = [wh.heuristic for wh in first_child]
+                    second_child = generate_random_heuristics(heuristics_list)
+                    stagnation = 0
+                    print("Stagnated. Restarting second child.")
+                else:
+                    second_child = perturb(first_child, prob)
                 print("First child won: {}".format(results))
-            elif results in second_wins_most:
+            elif outcome < 0:
                 # Second child won most times so improve his opponent.
                 # Also rank them such that first child is always the best.
                 first_child = second_child
-                second_child = perturb(second_child, perturbations)
+                second_child = perturb(second_child, prob)
+                stagnation = 0
                 print("Second child won: {}".format(results))
             else:
                 # Draw so play again but increase the thought time this time.
@@ -112,15 +418,43 @@ def climb(first_heuristics, second_heuristics, board, generations=100,
     except KeyboardInterrupt:
         print(_format_heuristics(first_child))
         return
+    finally:
+        if own_pool:
+            pool.shutdown()
 
     print(_format_heuristics(first_child))
 
 
+async def climb_many(candidate_pairs, board, generations=100,
+                     perturbations=0.25):
+    """Climbs several independent candidate pairs concurrently.
+
+    All climbs share one worker pool and step in lockstep on the same
+    event loop, so games from every pair interleave and keep the workers
+    saturated instead of idling between generations of a single climb.
+
+    Args:
+        candidate_pairs: List of (first, second) weighted heuristic list
+            pairs to climb.
+        board: Board class to play on.
+        generations: Number of generations to climb for.
+        perturbations: Starting probability of each weight being perturbed.
+    """
+    pool = ProcessPoolExecutor()
+    try:
+        await asyncio.gather(
+            *[climb(first, second, board, generations, perturbations,
+                    pool=pool)
+              for first, second in candidate_pairs])
+    finally:
+        pool.shutdown()
+
+
 if __name__ == "__main__":
     all_heuristics = [
-        heuristics.DistanceToCenterHeuristic,
-        heuristics.GoalHeuristic,
-        heuristics.NumberOfRunsOfTwoHeuristic
+        heuristics.compute_distance_to_center,
+        heuristics.compute_goal,
+        heuristics.compute_runs_of_two
     ]
 
     first_heuristics = generate_random_heuristics(all_heuristics)
@@ -128,6 +462,4 @@ if __name__ == "__main__":
 
     board = SmallBoard
 
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(climb(first_heuristics, second_heuristics, board))
-    loop.close()
+    asyncio.run(climb(first_heuristics, second_heuristics, board))
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from game import Game
-from base_board import Player
+from base_board import OPPONENT, Player
 
 
 class Learner(object):
@@ -24,18 +24,20 @@ class Learner(object):
         self._heuristics = weighted_heuristics
         self._transposition_table = transposition_table
         self._winner = winner
-        self._loser = Player(1 - winner.value)
+        self._loser = OPPONENT[winner]
 
     def learn(self):
         """Learns."""
         print("Looking for mistakes...")
 
         # Backtrack through game states until we find the first mistake.
+        updates = []
         first_unavoidable_death = None
-        game_states = list(self._all_game_states())
-        for i, state in reversed(list(enumerate(game_states))):
+        game_states = self._all_game_states()
+        for i in reversed(range(len(game_states))):
+            state, children = game_states[i]
             if state.turn == self._loser and i > 0:
-                if self._is_mistake(state):
+                if self._is_mistake(state, children):
                     first_unavoidable_death = i
                     print("Found unavoidable death at state: {}, turn: {}"
                           .format(i, state.turn.name))
@@ -51,8 +53,8 @@ class Learner(object):
             else:
                 mistake = first_unavoidable_death - 2
 
-            cause = game_states[mistake + 1]
-            effect = game_states[first_unavoidable_death]
+            cause, _ = game_states[mistake + 1]
+            effect, _ = game_states[first_unavoidable_death]
 
             print("Found mistake at move: {}, {}"
                   .format(mistake, self._moves[mistake]))
@@ -70,40 +72,67 @@ class Learner(object):
                 new_heuristic = effect_heuristic
 
             print("Setting heuristic to: {}".format(new_heuristic))
-            self._transposition_table._update_heuristic(cause, new_heuristic)
+            updates.append((cause, new_heuristic))
         else:
             print("Found no mistakes :)")
 
-    def _is_mistake(self, state):
+        if updates:
+            # Apply all updates in one batched pass so the table locks and
+            # commits once instead of per update.
+            self._transposition_table.bulk_update(updates)
+
+    def _is_mistake(self, state, children):
         """Returns whether the current state leads to an unavoidable loss or
         not.
 
         Args:
             state: State.
+            children: Precomputed list of the state's (move, next state)
+                tuples.
 
         Returns:
             Whether the given state certainly leads to an unavoidable loss to
             the current player's turn or not.
         """
-        for move, child in state.next_states():
-            if (child, 0) not in self._transposition_table:
+        table = self._transposition_table
+        turn_is_white = state.turn == Player.white
+        for move, child in children:
+            # Probe the table once instead of a containment check followed
+            # by a lookup, which costs two probes per child.
+            try:
+                v = table[(child, 0)]
+            except KeyError:
                 continue
 
-            v = self._transposition_table[(child, 0)]
-            if state.turn == Player.white:
+            if turn_is_white:
                 if v > -1000:
                     return False
-            elif state.turn == Player.black:
-                if v < 1000:
-                    return False
+            elif v < 1000:
+                return False
 
         return True
 
     def _all_game_states(self):
-        """Yields ordered list of game states as they were played."""
+        """Returns ordered list of game states as they were played.
+
+        Returns:
+            List of (game state, list of (move, next state) tuples) pairs.
+        """
         game = Game(self._root_board)
-        yield game.to_game_state()
+        state = game.to_game_state()
+        states = [(state, list(state.next_states()))]
 
         for move in self._moves:
             game.play(move)
-            yield game.to_game_state()
+            state = game.to_game_state()
+
+            # The final state of a finished game has no turn player, so
+            # it has no moves to expand; its children are never
+            # consulted anyway.
+            if state.turn is Player.none:
+                children = []
+            else:
+                children = list(state.next_states())
+            states.append((state, children))
+
+        return states
@@ -11,6 +11,8 @@ class InvalidMove(Exception):
         message: Exception message.
     """
 
+    __slots__ = ('message',)
+
     def __init__(self, message: str):
         """Constructs an InvalidMove with a message.
 
@@ -37,6 +39,15 @@ class Direction(Enum):
     south = 'S'
 
 
+# Cell offset for each move direction.
+_DELTA = {
+    Direction.north: (0, -1),
+    Direction.east: (1, 0),
+    Direction.west: (-1, 0),
+    Direction.south: (0, 1)
+}
+
+
 class Move(object):
 
     """A game move.
@@ -47,6 +58,8 @@ class Move(object):
         direction: Direction to move in.
     """
 
+    __slots__ = ('x', 'y', 'direction')
+
     def __init__(self, x, y, direction):
         """Constructs a Move.
 
@@ -59,6 +72,11 @@ class Move(object):
         self.y = y
         self.direction = direction
 
+    @property
+    def delta(self):
+        """Returns the (dx, dy) cell offset the move applies."""
+        return _DELTA[self.direction]
+
     @classmethod
     def from_str(cls, s):
         """Constructs a Move from a serialized string.
@@ -70,15 +88,10 @@ class Move(object):
         Returns:
             Move.
         """
-        if len(s) == 3:
-            x, y, d = tuple(s)
-            if str.isdigit(x) and str.isdigit(y) and str.isupper(d):
-                try:
-                    return Move(int(x) - 1, int(y) - 1, Direction(d))
-                except ValueError:
-                    pass
-
-        raise InvalidMove("Invalid string")
+        move = _ALL_MOVES.get(s)
+        if move is None:
+            raise InvalidMove("Invalid string")
+        return move
 
     def __str__(self):
         """Returns a valid string representation of the move.
@@ -87,3 +100,11 @@ class Move(object):
             Serialized move.
         """
         return "{0}{1}{2}".format(self.x + 1, self.y + 1, self.direction.value)
+
+
+# Every parsable move string mapped to a shared Move instance, so parsing
+# is a single dict probe and repeated strings reuse the same object.
+_ALL_MOVES = {"{}{}{}".format(x, y, d.value): Move(int(x) - 1, int(y) - 1, d)
+              for x in "0123456789"
+              for y in "0123456789"
+              for d in Direction}
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import os
 import itertools
+from math import inf
+from time import monotonic
+from operator import itemgetter
+from game import GameState
 from base_board import Player
 from abc import ABCMeta, abstractmethod
-
-try:
-    from math import inf
-except ImportError:
-    inf = float("inf")
+from heuristics import HeuristicBundle
+from concurrent.futures import ProcessPoolExecutor
+from transposition_table import (EXACT, LOWER, UPPER,
+                                 SharedTranspositionTable)
 
 
 class NoSolutionFound(Exception):
@@ -35,18 +39,21 @@ class Search(object, metaclass=ABCMeta):
         """
         self.player = player
         self.heuristics = heuristics
+        self._bundle = HeuristicBundle.from_weighted_heuristics(heuristics)
 
     @abstractmethod
-    def search(self, state):
+    def search(self, state, deadline=None):
         """Starts an indefinite search from the given root board with the given
         player's turn.
 
-        The longer this search runs, the better the solution provided. One
-        should cancel this task once it has been long enough, and then
-        request a move.
+        The longer this search runs, the better the solution provided.
+        Passing a deadline makes the search stop itself at a safe point;
+        without one it should be cancelled externally. Then request a
+        move.
 
         Args:
             state: Current game state.
+            deadline: Monotonic-clock time to stop searching at, if any.
         """
         raise NotImplementedError
 
@@ -67,6 +74,12 @@ class MinimaxSearch(Search):
 
     """Asynchronous minimax search."""
 
+    # Positions held before a per-searcher cache is dropped wholesale.
+    # Entries never go stale, but arbitrarily long runs must not grow
+    # the caches without bound; clearing on overflow bounds memory while
+    # keeping the hot path to one length check.
+    CACHE_LIMIT = 1 << 18
+
     def __init__(self, player, heuristics, transposition_table,
                  max_depth=None):
         """Constructs a Search using the provided heuristics.
@@ -83,30 +96,51 @@ class MinimaxSearch(Search):
         self._transposition_table = transposition_table
         self._max_depth = max_depth
 
-    def search(self, state):
+        # Sorted move lists cached by position hash, bounded by
+        # CACHE_LIMIT. Moves and their ordering depend only on the
+        # position, so iterative deepening revisits skip generation,
+        # scoring, and sorting entirely.
+        self._moves_cache = {}
+
+        # Monotonic-clock time to stop searching at, checked per node.
+        self._deadline = inf
+
+    def search(self, state, deadline=None):
         """Starts an indefinite search from the given root board with the given
         player's turn.
 
-        The longer this search runs, the better the solution provided. One
-        should cancel this task once it has been long enough, and then
-        request a move.
+        The longer this search runs, the better the solution provided.
+        Passing a deadline makes the search stop itself at a safe point,
+        keeping the best move of the last completed pass; without one it
+        should be cancelled externally. Then request a move.
 
         Args:
             state: Current game state.
+            deadline: Monotonic-clock time to stop searching at, if any.
         """
         self._best_next_move = None
         self._moves = 0
         self._positions = 0
-
-        for depth in itertools.count():
-            if self._max_depth and depth > self._max_depth:
-                return
-
-            root = state.copy()
-            self._best_next_move, value = self._search(root, 0, depth)
-            self._depth = depth
-            if (root, depth) not in self._transposition_table:
-                self._transposition_table[(root, depth)] = value
+        self._deadline = inf if deadline is None else deadline
+
+        try:
+            for depth in itertools.count():
+                if self._max_depth and depth > self._max_depth:
+                    return
+
+                root = state.copy()
+                self._best_next_move, value = self._search(root, 0, depth)
+                self._depth = depth
+                if (root, depth) not in self._transposition_table:
+                    self._transposition_table[(root, depth)] = value
+
+                # A pass produces a coherent batch of entries: push them
+                # to backing storage in one transaction where that
+                # applies.
+                self._transposition_table.flush()
+        except TimeoutError:
+            # Keep the results of the last pass that completed.
+            pass
 
     def request_move(self):
         """Requests the current best solution.
@@ -123,22 +157,14 @@ class MinimaxSearch(Search):
         else:
             raise NoSolutionFound
 
-    def _heuristics_key(self, child):
-        """Computes the weighted heuristics of a child game state.
-
-        Args:
-            child: Tuple of (move, game state).
-
-        Returns:
-            Computed heuristic.
-        """
-        _, state = child
-        return state.compute_heuristic(self.heuristics)
-
     def _search(self, state, curr_depth, max_depth):
         """Searches for the best move given the current board state by looking
         up to a certain depth.
 
+        The tree is walked iteratively over an explicit stack of frames
+        instead of recursing, which drops the per-node Python frame setup
+        and keeps deep searches clear of the recursion limit.
+
         Args:
             state: Game state.
             curr_depth: Current depth looking at.
@@ -147,68 +173,217 @@ class MinimaxSearch(Search):
         Returns:
             Tuple of the (best move, its value).
         """
-        if state.won_by() != Player.none:
+        table = self._transposition_table
+        evaluate = self._bundle.evaluate
+        evaluate_moves = self._bundle.evaluate_moves
+        moves_cache = self._moves_cache
+        cache_limit = self.CACHE_LIMIT
+
+        if state.won_by() is not Player.none:
             # Favor closer wins.
-            v = state.compute_heuristic(self.heuristics)
+            v = evaluate(state.board, state.turn)
             return (None, v / curr_depth)
         if curr_depth == max_depth:
-            return (None, state.compute_heuristic(self.heuristics))
-
-        best_move = None
-        best_value = None
-
-        if state.turn == Player.white:
-            children = sorted(state.next_states(), key=self._heuristics_key,
-                              reverse=True)
-        else:
-            children = sorted(state.next_states(), key=self._heuristics_key)
-
-        depth_to_search = max_depth - curr_depth
-        for move, child in children:
+            return (None, evaluate(state.board, state.turn))
+
+        def new_frame(frame_state):
+            # A frame is [state, sorted moves, next move index, best move,
+            # best value, pending descent record, turn is white].
+            turn_is_white = frame_state.turn is Player.white
+            moves = moves_cache.get(frame_state._zhash)
+            if moves is None:
+                moves = sorted(evaluate_moves(frame_state),
+                               key=itemgetter(0),
+                               reverse=turn_is_white)
+                if len(moves_cache) >= cache_limit:
+                    moves_cache.clear()
+                moves_cache[frame_state._zhash] = moves
+            return [frame_state, moves, 0, None, None, None, turn_is_white]
+
+        deadline = self._deadline
+        stack = [new_frame(state)]
+        while True:
+            if monotonic() >= deadline:
+                raise TimeoutError
+
+            frame = stack[-1]
+            moves = frame[1]
+            i = frame[2]
+
+            if i == len(moves):
+                # Frame exhausted: propagate its value to the parent.
+                stack.pop()
+                if not stack:
+                    return (frame[3], frame[4])
+
+                parent = stack[-1]
+                undo, child, move, depth_to_search = parent[5]
+                v = frame[4]
+                child.board.undo(undo)
+
+                # A child whose side to move has no legal moves produces
+                # no value; skip it rather than comparing against None.
+                if v is not None:
+                    table[(child, depth_to_search)] = v
+                    best_value = parent[4]
+                    if best_value is None or (v > best_value if parent[6]
+                                              else v < best_value):
+                        parent[3] = move
+                        parent[4] = v
+                continue
+
+            frame[2] = i + 1
+            frame_state = frame[0]
+            board = frame_state.board
+            score, move = moves[i]
+            depth = curr_depth + len(stack) - 1
+            depth_to_search = max_depth - depth
+
+            # Descend by mutating the board in place and undoing on the
+            # way back up, rather than allocating a board per node.
+            undo = board.apply(move)
+            child = GameState(board, frame_state._next_turn)
+
+            if depth_to_search == 1:
+                # A depth-1 child is worth exactly the evaluation already
+                # computed to order this move list, so skip the table
+                # probe and store; only closer wins need rescaling.
+                if child.won_by() is not Player.none:
+                    v = score / (depth + 1)
+                else:
+                    v = score
             # Check if this board had been analyzed to this depth before.
-            if (child, depth_to_search) in self._transposition_table:
-                v = self._transposition_table[(child, depth_to_search)]
+            elif (child, depth_to_search) in table:
+                v = table[(child, depth_to_search)]
+            elif child.won_by() is not Player.none:
+                # Favor closer wins.
+                v = evaluate(child.board, child.turn) / (depth + 1)
+                table[(child, depth_to_search)] = v
             else:
-                _, v = self._search(child, curr_depth + 1, max_depth)
-                self._transposition_table[(child, depth_to_search)] = v
+                # Push a frame for the child and come back for its value
+                # once it is exhausted.
+                frame[5] = (undo, child, move, depth_to_search)
+                stack.append(new_frame(child))
+                continue
 
-            if self._minimax_comparator(best_value, v, state.turn):
-                best_move = move
-                best_value = v
+            board.undo(undo)
 
-        return (best_move, best_value)
+            best_value = frame[4]
+            if best_value is None or (v > best_value if frame[6] else
+                                      v < best_value):
+                frame[3] = move
+                frame[4] = v
+
+
+class AlphaBetaPrunedMinimaxSearch(MinimaxSearch):
 
-    def _minimax_comparator(self, best_value, current_value, turn):
-        """Compares heuristic values based on the turn such that each player
-        plays their optimal move.
+    """Minimax search with alpha-beta pruning."""
 
-        The black player tries to minimize the heuristic value, whereas the
-        white player tries to maximize it.
+    def __init__(self, player, heuristics, transposition_table,
+                 max_depth=None):
+        """Constructs a Search using the provided heuristics.
 
         Args:
-            best_value: Current best value.
-            current_value: Current heuristic value to evaluate.
-            turn: Current player's turn.
+            player: Player to search for.
+            heuristics: List of weighted heuristics to use.
+            transposition_table: Transposition table.
+            max_depth: Max depth to search. Infinite if none.
+        """
+        super().__init__(player, heuristics, transposition_table, max_depth)
+
+        # Best move found per state hash, carried across iterative
+        # deepening passes for principal-variation move ordering.
+        self._best_moves = {}
+
+        # Two recent cutoff-causing move keys per ply, tried right after
+        # the principal-variation move.
+        self._killers = []
+
+        # Whether to print per-root-child progress while searching. The
+        # formatting and terminal writes are slow enough to serialize
+        # with the search itself, so this is off by default.
+        self.verbose = False
+
+        # Loud destination cells memoized by position hash, bounded by
+        # CACHE_LIMIT. Which cells would complete a run of three depends
+        # only on the position, so entries never go stale.
+        self._loud_cache = {}
+
+    # Half-width of the aspiration window, in heuristic units.
+    ASPIRATION = 0.25
+
+    # Max plies the quiescence search may extend past the horizon.
+    QUIESCENCE_DEPTH = 4
+
+    def search(self, state, deadline=None):
+        """Starts an indefinite search from the given root board with the given
+        player's turn.
+
+        The longer this search runs, the better the solution provided.
+        Passing a deadline makes the search stop itself at a safe point,
+        keeping the best move of the last completed pass; without one it
+        should be cancelled externally. Then request a move.
+
+        Each deepening pass searches an aspiration window around the
+        previous pass's value rather than the full window: most of the
+        time the value moves little between depths, and a narrow window
+        prunes far more. A value landing on the window edge triggers a
+        re-search with that side opened up.
 
-        Return:
-            Whether the current value is better or not.
+        Args:
+            state: Current game state.
+            deadline: Monotonic-clock time to stop searching at, if any.
         """
-        if best_value is None:
-            return True
-        elif current_value is None:
-            return False
-
-        if turn == Player.white:
-            return current_value > best_value
-        elif turn == Player.black:
-            return current_value < best_value
-        else:
-            raise NotImplementedError
+        self._best_moves.clear()
+        self._killers.clear()
+        self._best_next_move = None
+        self._moves = 0
+        self._positions = 0
+        self._deadline = inf if deadline is None else deadline
 
+        try:
+            self._deepen(state)
+        except TimeoutError:
+            # Keep the results of the last pass that completed.
+            pass
 
-class AlphaBetaPrunedMinimaxSearch(MinimaxSearch):
+    def _deepen(self, state):
+        """Runs iterative-deepening passes until stopped.
 
-    """Minimax search with alpha-beta pruning."""
+        Args:
+            state: Current game state.
+        """
+        value = None
+        for depth in itertools.count():
+            if self._max_depth and depth > self._max_depth:
+                return
+
+            root = state.copy()
+            if value is None:
+                move, value = self._search(root, 0, depth)
+            else:
+                alpha = value - self.ASPIRATION
+                beta = value + self.ASPIRATION
+                move, value = self._search(root, 0, depth, alpha, beta)
+                if value is not None and value <= alpha:
+                    move, value = self._search(root, 0, depth, -inf, beta)
+                    if value is not None and value >= beta:
+                        # Failed both ways; settle with the full window.
+                        move, value = self._search(root, 0, depth)
+                elif value is not None and value >= beta:
+                    move, value = self._search(root, 0, depth, alpha, inf)
+                    if value is not None and value <= alpha:
+                        # Failed both ways; settle with the full window.
+                        move, value = self._search(root, 0, depth)
+
+            self._best_next_move = move
+            self._depth = depth
+            if (root, depth) not in self._transposition_table:
+                self._transposition_table[(root, depth)] = value
+
+            # A pass produces a coherent batch of entries: push them to
+            # backing storage in one transaction where that applies.
+            self._transposition_table.flush()
 
     def _search(self, state, curr_depth, max_depth, alpha=-inf, beta=inf):
         """Searches for the best move given the current board state by looking
@@ -224,46 +399,473 @@ class AlphaBetaPrunedMinimaxSearch(MinimaxSearch):
         Returns:
             Tuple of the (best move, its value).
         """
-        if state.won_by() != Player.none:
+        if monotonic() >= self._deadline:
+            raise TimeoutError
+
+        if state.won_by() is not Player.none:
             # Favor closer wins.
-            v = state.compute_heuristic(self.heuristics)
+            v = self._bundle.evaluate(state.board, state.turn)
             return (None, v / curr_depth)
         if curr_depth == max_depth:
-            return (None, state.compute_heuristic(self.heuristics))
+            v = self._quiesce(state, curr_depth, self.QUIESCENCE_DEPTH)
+            return (None, v)
+
+        table = self._transposition_table
+        depth_to_search = max_depth - curr_depth
+
+        # A stored entry can cut the node off outright when it is exact,
+        # or tighten the window when it is a bound left by an earlier
+        # cutoff. The root always searches fully so a move is returned.
+        if curr_depth > 0:
+            entry = table.probe(state)
+            if entry is not None and entry[0] >= depth_to_search:
+                _, entry_value, flag = entry
+                if flag == EXACT:
+                    return (None, entry_value)
+                elif flag == LOWER:
+                    if entry_value > alpha:
+                        alpha = entry_value
+                elif entry_value < beta:
+                    beta = entry_value
+                if alpha >= beta:
+                    return (None, entry_value)
+
+        alpha_orig = alpha
+        beta_orig = beta
 
         best_move = None
         best_value = None
 
-        if state.turn == Player.white:
-            children = sorted(state.next_states(), key=self._heuristics_key,
-                              reverse=True)
-        else:
-            children = sorted(state.next_states(), key=self._heuristics_key)
-
-        depth_to_search = max_depth - curr_depth
-        for move, child in children:
-            # Check if this board had been analyzed to this depth before.
-            if (child, depth_to_search) in self._transposition_table:
-                v = self._transposition_table[(child, depth_to_search)]
+        # Hoist the turn check out of the loop: enum identity is checked
+        # once per node instead of once per child.
+        turn_is_white = state.turn is Player.white
+
+        moves = self._moves_cache.get(state._zhash)
+        if moves is None:
+            moves = sorted(self._bundle.evaluate_moves(state),
+                           key=itemgetter(0),
+                           reverse=turn_is_white)
+            if len(self._moves_cache) >= self.CACHE_LIMIT:
+                self._moves_cache.clear()
+            self._moves_cache[state._zhash] = moves
+
+        while len(self._killers) <= curr_depth:
+            self._killers.append([None, None])
+        killers = self._killers[curr_depth]
+
+        # Try the best move of the previous deepening pass first, then
+        # moves that recently caused cutoffs at this ply: a good early
+        # move tightens the window and prunes more of the rest.
+        pv_key = self._best_moves.get(state._zhash)
+        front = 0
+        owned = False
+        for key in (pv_key, killers[0], killers[1]):
+            if key is None:
+                continue
+            for i in range(front, len(moves)):
+                move = moves[i][1]
+                if (move.x, move.y, move.direction) == key:
+                    if i != front:
+                        if not owned:
+                            # Reorder a copy so the cached list stays
+                            # intact for any enclosing visit of the same
+                            # position.
+                            moves = list(moves)
+                            owned = True
+                        moves.insert(front, moves.pop(i))
+                    front += 1
+                    break
+
+        # Bind the per-child lookups once: each of these is an attribute
+        # or global load CPython would otherwise repeat every iteration
+        # of the hottest loop in the program.
+        board = state.board
+        next_turn = state._next_turn
+        trivial = curr_depth + 1 == max_depth
+        child_depth = curr_depth + 1
+        apply_move = board.apply
+        undo_move = board.undo
+        descend = self._search
+        make_state = GameState
+        for score, move in moves:
+            # Descend by mutating the board in place and undoing on the
+            # way back up, rather than allocating a board per node.
+            undo = apply_move(move)
+            child = make_state(board, next_turn)
+
+            if trivial:
+                # A depth-1 child starts from the evaluation already
+                # computed to order this move list, so skip the table
+                # probe and store; closer wins need rescaling and quiet
+                # leaves are settled against immediate threats.
+                if child.won_by() is not Player.none:
+                    v = score / child_depth
+                else:
+                    v = self._quiesce(child, child_depth,
+                                      self.QUIESCENCE_DEPTH)
             else:
-                _, v = self._search(child, curr_depth + 1, max_depth,
-                                    alpha, beta)
-                self._transposition_table[(child, depth_to_search)] = v
+                # The child probes and stores its own entry, classified
+                # by the window it was searched under.
+                _, v = descend(child, child_depth, max_depth, alpha, beta)
+
+            undo_move(undo)
 
-            if self._minimax_comparator(best_value, v, state.turn):
+            # A child whose side to move has no legal moves produces no
+            # value; skip it rather than comparing against None.
+            if v is None:
+                continue
+
+            if best_value is None or (v > best_value if turn_is_white else
+                                      v < best_value):
                 best_move = move
                 best_value = v
+                if turn_is_white:
+                    alpha = max(alpha, best_value)
+                else:
+                    beta = min(beta, best_value)
 
-            if curr_depth == 0:
+            if curr_depth == 0 and self.verbose:
                 print("depth: {}, considering: {}, move: {}, best: {}"
                       .format(max_depth, str(move), v, str(best_move)))
 
-            if best_value is not None and state.turn == Player.white:
-                alpha = max(alpha, best_value)
-            elif best_value is not None and state.turn == Player.black:
-                beta = min(beta, best_value)
-
             if alpha >= beta:
+                # Remember the cutoff move for sibling nodes at this ply.
+                key = (move.x, move.y, move.direction)
+                if killers[0] != key:
+                    killers[1] = killers[0]
+                    killers[0] = key
                 break
 
+        if best_value is not None:
+            # Classify what the window allowed this value to mean before
+            # storing it: a fail-low is only an upper bound on the true
+            # value, a fail-high only a lower bound.
+            if best_value <= alpha_orig:
+                flag = UPPER
+            elif best_value >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            table.store(state, depth_to_search, best_value, flag)
+
+        if best_move is not None:
+            self._best_moves[state._zhash] = (best_move.x, best_move.y,
+                                              best_move.direction)
+
         return (best_move, best_value)
+
+    def _loud_destinations(self, board):
+        """Computes the cells a move into which would complete a run of three.
+
+        A cell is loud for a side if that side has exactly two pieces on
+        a winning streak through it and the streak is not blocked. The
+        sets depend only on the position, not on whose turn it is, so
+        they are shared between both players.
+
+        Args:
+            board: Current board.
+
+        Returns:
+            Tuple of bitmasks of cells completing a white and a black run
+            of three respectively.
+        """
+        loud = self._loud_cache.get(board._zhash)
+        if loud is None:
+            white = board._white_pieces
+            black = board._black_pieces
+            empty = (1 << board.WIDTH * board.HEIGHT) - 1 & ~(white | black)
+            streaks = board._STREAKS
+            loud = (_completion_cells(white, empty, streaks),
+                    _completion_cells(black, empty, streaks))
+            if len(self._loud_cache) >= self.CACHE_LIMIT:
+                self._loud_cache.clear()
+            self._loud_cache[board._zhash] = loud
+        return loud
+
+    def _quiesce(self, state, curr_depth, remaining):
+        """Settles a leaf evaluation against immediate winning threats.
+
+        Evaluating a position statically right as a run of three is about
+        to complete misjudges it: the threat resolves one ply past the
+        horizon. This extends the search past the horizon with loud moves
+        only — those landing on a cell that completes a run of three for
+        either side — taking the static evaluation as the stand-pat
+        value, so quiet positions cost a single cached evaluation.
+
+        When the opponent can complete a run on their next move, standing
+        pat is not an option: only winning first or occupying the
+        completion cell can answer, so quiet moves are rightly excluded
+        and a position with no such answer scores as the loss it is.
+
+        No window is applied: loud moves are rare enough that the full
+        minimax over them is cheap, and the returned value stays
+        independent of the enclosing window so transposition table flags
+        remain sound.
+
+        Args:
+            state: Game state to settle.
+            curr_depth: Depth of the leaf, for win rescaling.
+            remaining: Max further plies to extend.
+
+        Returns:
+            The settled value of the state.
+        """
+        board = state.board
+        value = self._bundle.evaluate(board, state.turn)
+        if remaining == 0:
+            return value
+
+        white_completions, black_completions = self._loud_destinations(board)
+        turn_is_white = state.turn is Player.white
+        if turn_is_white:
+            own_completions = white_completions
+            opp_completions = black_completions
+            own_pieces = board._white_pieces
+            opp_pieces = board._black_pieces
+        else:
+            own_completions = black_completions
+            opp_completions = white_completions
+            own_pieces = board._black_pieces
+            opp_pieces = board._white_pieces
+        if own_completions | opp_completions == 0:
+            return value
+
+        # A completion is live only if a piece of its side is one move
+        # away from the cell; two on a streak with nobody in reach is
+        # quiet. The whole-board shift per direction mirrors the move
+        # generator; a shifted-in piece that was itself part of the
+        # streak is a false positive, which only costs a scan below.
+        if own_completions:
+            dests = 0
+            for shift, left, mask, _ in board._DIRECTIONS:
+                dests |= (own_pieces << shift if left
+                          else own_pieces >> shift) & mask
+            own_completions &= dests
+        if opp_completions:
+            dests = 0
+            for shift, left, mask, _ in board._DIRECTIONS:
+                dests |= (opp_pieces << shift if left
+                          else opp_pieces >> shift) & mask
+            opp_completions &= dests
+        loud = own_completions | opp_completions
+        if loud == 0:
+            return value
+
+        threatened = opp_completions != 0
+        best = None if threatened else value
+        next_turn = state._next_turn
+        child_depth = curr_depth + 1
+        apply_move = board.apply
+        undo_move = board.undo
+        # Generate moves landing on loud cells directly, as the move
+        # generator does, rather than scanning every available move:
+        # loud cells are empty, so any of the mover's pieces shifted
+        # onto one is a legal move.
+        for shift, left, mask, direction_moves in board._DIRECTIONS:
+            dests = (own_pieces << shift if left else own_pieces >> shift)
+            dests &= mask & loud
+            while dests:
+                lsb = dests & -dests
+                dests ^= lsb
+                move = direction_moves[lsb.bit_length() - 1]
+
+                undo = apply_move(move)
+                if board.winner() is not Player.none:
+                    # Favor closer wins, as the main search does.
+                    v = self._bundle.evaluate(board, next_turn) / child_depth
+                    undo_move(undo)
+                    # Nothing beats completing a run of three.
+                    return v
+
+                child = GameState(board, next_turn)
+                v = self._quiesce(child, child_depth, remaining - 1)
+                undo_move(undo)
+
+                if best is None or (v > best if turn_is_white else v < best):
+                    best = v
+
+        if threatened and best is None:
+            # Neither a win nor a block: the opponent completes the run
+            # next ply. Score the first such completion, falling back to
+            # the stand-pat value if the threat was a false positive.
+            for move in board.available_moves(next_turn):
+                undo = apply_move(move)
+                if board.winner() is not Player.none:
+                    best = (self._bundle.evaluate(board, state.turn) /
+                            (curr_depth + 2))
+                    undo_move(undo)
+                    break
+                undo_move(undo)
+
+        return value if best is None else best
+
+
+class ParallelMinimaxSearch(MinimaxSearch):
+
+    """Minimax search parallelized across root moves.
+
+    Each iterative deepening pass splits the root children over a pool of
+    worker processes and combines their values at the root. The caller's
+    transposition table is left untouched since workers search with their
+    own in-memory tables.
+    """
+
+    def search(self, state, deadline=None):
+        """Starts an indefinite search from the given root board with the given
+        player's turn.
+
+        The longer this search runs, the better the solution provided.
+        The deadline is checked between deepening passes, since workers
+        cannot be interrupted mid-task; the last pass may overshoot it.
+
+        Args:
+            state: Current game state.
+            deadline: Monotonic-clock time to stop searching at, if any.
+        """
+        self._best_next_move = None
+        self._deadline = inf if deadline is None else deadline
+
+        pool = ProcessPoolExecutor()
+        table = SharedTranspositionTable()
+        try:
+            for depth in itertools.count(1):
+                if self._max_depth and depth > self._max_depth:
+                    return
+                if monotonic() >= self._deadline:
+                    return
+
+                move, _ = parallel_root_search(state, depth, self.heuristics,
+                                               pool, table)
+                self._best_next_move = move
+                self._depth = depth
+        finally:
+            # Don't block on workers mid-depth when the search times out.
+            pool.shutdown(wait=False)
+            table.close()
+
+
+# Shared transposition tables this worker process has attached to.
+_shared_tables = {}
+
+
+def _completion_cells(pieces, empty, streaks):
+    """Computes the empty cells that would complete a run of three.
+
+    Works a direction at a time on whole-board shifts, like the win
+    check: a pair with a gap before, after or between it marks the gap
+    cell. The streak masks keep runs from wrapping across rows.
+
+    Args:
+        pieces: Pieces of the side to complete for, as an int.
+        empty: Unoccupied cells as an int, bounded to the board so that
+            pairs whose gap falls off the edge are discarded.
+        streaks: Streak kernels of the board, as (shift, double shift,
+            valid start cells) triples.
+
+    Returns:
+        Bitmask of completing cells.
+    """
+    cells = 0
+    for shift, shift2, mask in streaks:
+        pair = pieces & (pieces >> shift)
+        # Pair then gap, gap then pair, and a gapped pair.
+        cells |= (pair & mask) << shift2
+        cells |= (pieces >> shift) & (pieces >> shift2) & mask
+        cells |= (pieces & (pieces >> shift2) & mask) << shift
+    return cells & empty
+
+
+def _attach_shared_table(name):
+    """Attaches to a shared transposition table, reusing the attachment
+    across tasks in the same worker process.
+
+    Args:
+        name: Name of the table's shared memory block.
+
+    Returns:
+        SharedTranspositionTable.
+    """
+    table = _shared_tables.get(name)
+    if table is None:
+        table = _shared_tables[name] = SharedTranspositionTable(name)
+    return table
+
+
+def _search_subtree(args):
+    """Searches a single root child in a worker process.
+
+    Args:
+        args: Tuple of (game state, max depth to search, weighted heuristics,
+            name of the shared transposition table).
+
+    Returns:
+        The value of the subtree rooted at the given state.
+    """
+    state, max_depth, heuristics, table_name = args
+    searcher = AlphaBetaPrunedMinimaxSearch(state.turn, heuristics,
+                                            _attach_shared_table(table_name),
+                                            max_depth)
+    if state.won_by() != Player.none or max_depth == 0:
+        return searcher._bundle.evaluate(state.board, state.turn)
+
+    _, value = searcher._search(state, 0, max_depth)
+    return value
+
+
+def parallel_root_search(state, max_depth, heuristics, pool=None, table=None):
+    """Searches each root child in a separate process.
+
+    Root children are independent subtrees so they can be searched in
+    parallel and combined at the root. Workers share one transposition
+    table in shared memory so transpositions found in one subtree are
+    reused by the others.
+
+    Args:
+        state: Current game state.
+        max_depth: Max depth to search.
+        heuristics: List of weighted heuristics to use.
+        pool: Process pool to run on. One is created if not provided.
+        table: Shared transposition table for the workers. A throwaway
+            one is created if not provided.
+
+    Returns:
+        Tuple of the (best move, its value).
+
+    Raises:
+        NoSolutionFound: If there are no available moves.
+    """
+    children = list(state.next_states())
+    if not children:
+        raise NoSolutionFound
+
+    own_table = None
+    if table is None:
+        table = own_table = SharedTranspositionTable()
+
+    tasks = [(child, max_depth - 1, heuristics, table.name)
+             for _, child in children]
+    ncpu = os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (4 * ncpu))
+    try:
+        if pool is None:
+            with ProcessPoolExecutor() as own_pool:
+                values = list(own_pool.map(_search_subtree, tasks,
+                                           chunksize=chunksize))
+        else:
+            values = list(pool.map(_search_subtree, tasks,
+                                   chunksize=chunksize))
+    finally:
+        if own_table is not None:
+            own_table.close()
+
+    best_move = None
+    best_value = None
+    for (move, _), value in zip(children, values):
+        if best_value is None:
+            best_move, best_value = move, value
+        elif state.turn == Player.white and value > best_value:
+            best_move, best_value = move, value
+        elif state.turn == Player.black and value < best_value:
+            best_move, best_value = move, value
+
+    return (best_move, best_value)
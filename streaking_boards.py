@@ -1,77 +1,164 @@
 # -*- coding: utf-8 -*-
 
-from base_board import Board, Player
+from functools import lru_cache
+from itertools import tee
 
 
 def _consecutive(l, n):
-    """Yields all consecutive n elements from an enumerator.
-    
+    """Yields all consecutive n elements from an iterable.
+
+    The iterable is tee'd n ways with each branch advanced one element
+    further, so any iterable works — not just sliceable sequences — and
+    no copies of the input are allocated.
+
     Args:
-        l: Enumerator.
+        l: Iterable.
         n: Number of elements to take at a time.
-    
+
     Yields:
         All consecutive n numbers as tuples.
     """
-    for t in zip(*(l[x:] for x in range(n))):
-        yield t
+    iterators = tee(l, n)
+    for skip, iterator in enumerate(iterators):
+        for _ in range(skip):
+            next(iterator, None)
+    yield from zip(*iterators)
 
 
-def generate_streaking_boards(board_class, n):
-    """Generates all streaks for a given board type as ints.
-    
-    Argsstreaking:
+def _horizontal_streaks(board_class, n):
+    """Yields all horizontal streaks for a given board type as ints.
+
+    Args:
         board_class: Board class type.
         n: Length of streaks.
 
-    Returns:
-        Set of all streaking states.
+    Yields:
+        All horizontal streaking states.
     """
-    states = set()
     width, height = board_class.WIDTH, board_class.HEIGHT
-    
-    # Generate all horizontal streaking boards.
     for y in range(height):
         for t in _consecutive(range(width), n):
-            board = board_class(0, 0)
+            mask = 0
             for x in t:
-                 board.set(x, y, Player.white)
-            states.add(board._white_pieces) 
+                mask |= 1 << (y * width + x)
+            yield mask
+
+
+def _vertical_streaks(board_class, n):
+    """Yields all vertical streaks for a given board type as ints.
+
+    Args:
+        board_class: Board class type.
+        n: Length of streaks.
 
-    # Generate all vertical streaking boards.
+    Yields:
+        All vertical streaking states.
+    """
+    width, height = board_class.WIDTH, board_class.HEIGHT
     for x in range(width):
         for t in _consecutive(range(height), n):
-            board = board_class(0, 0)
+            mask = 0
             for y in t:
-                board.set(x, y, Player.white)
-            states.add(board._white_pieces) 
+                mask |= 1 << (y * width + x)
+            yield mask
+
 
-    # Generate all left-to-right diagonal streaking boards.
+def _left_diagonal_streaks(board_class, n):
+    """Yields all left-to-right diagonal streaks for a given board type as
+    ints.
+
+    Args:
+        board_class: Board class type.
+        n: Length of streaks.
+
+    Yields:
+        All left-to-right diagonal streaking states.
+    """
+    width, height = board_class.WIDTH, board_class.HEIGHT
     for x in range(width - n + 1):
         for t in _consecutive(range(height), n):
-            board = board_class(0, 0)
+            mask = 0
             for i, y in enumerate(t):
-                 board.set(x + i, y, Player.white)
-            states.add(board._white_pieces) 
+                mask |= 1 << (y * width + x + i)
+            yield mask
+
+
+def _right_diagonal_streaks(board_class, n):
+    """Yields all right-to-left diagonal streaks for a given board type as
+    ints.
+
+    Args:
+        board_class: Board class type.
+        n: Length of streaks.
 
-    # Generate all right-to-left diagonal streaking boards.
+    Yields:
+        All right-to-left diagonal streaking states.
+    """
+    width, height = board_class.WIDTH, board_class.HEIGHT
     for x in range(width - n + 1):
         for t in _consecutive(range(height), n):
-            board = board_class(0, 0)
+            mask = 0
             for i, y in enumerate(t):
-                 board.set(x + n - 1 - i, y, Player.white)
-            states.add(board._white_pieces) 
+                mask |= 1 << (y * width + x + n - 1 - i)
+            yield mask
+
+
+_ORIENTATIONS = (_horizontal_streaks, _vertical_streaks,
+                 _left_diagonal_streaks, _right_diagonal_streaks)
 
-    return states
+
+@lru_cache(maxsize=None)
+def generate_streaking_boards(board_class, n):
+    """Generates all streaks for a given board type as ints.
+
+    The result is invariant per (board type, length) pair and memoized,
+    so repeated callers share one tuple.
+
+    Args:
+        board_class: Board class type.
+        n: Length of streaks.
+
+    Returns:
+        Tuple of all streaking states.
+    """
+    states = set()
+    for orientation in _ORIENTATIONS:
+        states.update(orientation(board_class, n))
+    return tuple(states)
+
+
+@lru_cache(maxsize=None)
+def generate_streaking_board_groups(board_class, n):
+    """Generates all streaks for a given board type grouped by orientation.
+
+    Grouping the masks lets callers skip a whole orientation at once when
+    no piece coincides with its combined mask.
+
+    Args:
+        board_class: Board class type.
+        n: Length of streaks.
+
+    Returns:
+        Tuple of (combined mask, streak masks) pairs, one per orientation
+        (horizontal, vertical and both diagonals).
+    """
+    groups = []
+    for orientation in _ORIENTATIONS:
+        masks = tuple(set(orientation(board_class, n)))
+        combined = 0
+        for mask in masks:
+            combined |= mask
+        groups.append((combined, masks))
+    return tuple(groups)
 
 
 def generate_winning_boards(board_class):
     """Generates all winning states for a given board type as ints.
-    
+
     Args:
         board_class: Board class type.
 
     Returns:
-        Set of all winning states.
+        Tuple of all winning states.
     """
     return generate_streaking_boards(board_class, 3)
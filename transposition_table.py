@@ -1,8 +1,21 @@
 # -*- coding: utf-8 -*-
 
+import struct
 import sqlite3
+import weakref
+from game import GameState
+from base_board import Player
 from threading import Lock
 from abc import ABCMeta, abstractmethod
+from multiprocessing import shared_memory
+
+
+# Alpha-beta bound classification of a stored value: an exact minimax
+# value, a lower bound from a search that failed high, or an upper bound
+# from a search that failed low.
+EXACT = 0
+LOWER = 1
+UPPER = 2
 
 
 class TranspositionTable(object, metaclass=ABCMeta):
@@ -43,6 +56,31 @@ class TranspositionTable(object, metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def probe(self, state):
+        """Returns the entry stored for a state regardless of depth.
+
+        Args:
+            state: Game state.
+
+        Returns:
+            Tuple of (depth searched, value, flag), or None if the state
+            has no entry.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def store(self, state, depth_searched, value, flag):
+        """Stores a value along with its alpha-beta bound classification.
+
+        Args:
+            state: Game state.
+            depth_searched: Depth the state was searched to.
+            value: Value.
+            flag: One of EXACT, LOWER or UPPER.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def _update_heuristic(self, state, heuristic):
         """Updates the heuristic value in the table without updating the depth
@@ -54,6 +92,20 @@ class TranspositionTable(object, metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def bulk_update(self, updates):
+        """Updates a batch of heuristic values in one pass without updating
+        the depths searched.
+
+        Args:
+            updates: List of (game state, heuristic value) tuples.
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """Pushes any buffered writes to the table's backing store."""
+        pass
+
 
 class EmptyTranspositionTable(object, metaclass=ABCMeta):
 
@@ -90,6 +142,28 @@ class EmptyTranspositionTable(object, metaclass=ABCMeta):
         """
         pass
 
+    def probe(self, state):
+        """Returns the entry stored for a state regardless of depth.
+
+        Args:
+            state: Game state.
+
+        Returns:
+            None, as nothing is ever stored.
+        """
+        return None
+
+    def store(self, state, depth_searched, value, flag):
+        """Stores a value along with its alpha-beta bound classification.
+
+        Args:
+            state: Game state.
+            depth_searched: Depth the state was searched to.
+            value: Value.
+            flag: One of EXACT, LOWER or UPPER.
+        """
+        pass
+
     def _update_heuristic(self, state, heuristic):
         """Updates the heuristic value in the table without updating the depth
         searched.
@@ -100,14 +174,38 @@ class EmptyTranspositionTable(object, metaclass=ABCMeta):
         """
         pass
 
+    def bulk_update(self, updates):
+        """Updates a batch of heuristic values in one pass without updating
+        the depths searched.
+
+        Args:
+            updates: List of (game state, heuristic value) tuples.
+        """
+        pass
+
+    def flush(self):
+        """Pushes any buffered writes to the table's backing store."""
+        pass
+
 
 class TemporaryTranspositionTable(object):
 
-    """Transposition table stored in memory."""
+    """Transposition table stored in memory.
+
+    Entries are keyed by the state's canonical 64-bit Zobrist hash rather
+    than the state itself, and mirrored positions share a single entry.
+    A fixed number of slots bounds the memory of arbitrarily long runs:
+    each hash indexes a depth-preferred slot that only deeper analysis
+    may evict, backed by an always-replace slot so fresh entries are
+    never lost to one deep resident.
+    """
+
+    SLOTS = 1 << 20
 
     def __init__(self):
         """Constructs a TemporaryTranspositionTable."""
-        self._table = dict()
+        self._depth_preferred = [None] * self.SLOTS
+        self._always = [None] * self.SLOTS
 
     def __contains__(self, key):
         """Returns whether a key is contained in the table or not.
@@ -118,11 +216,10 @@ class TemporaryTranspositionTable(object):
         Returns:
             Whether the key is stored in the table or not.
         """
-        try:
-            self[key]
-            return True
-        except KeyError:
-            return False
+        state, depth_to_search = key
+        entry = self._find(state._chash)
+        return (entry is not None and entry[3] == EXACT and
+                entry[1] >= depth_to_search)
 
     def __getitem__(self, key):
         """Returns the value in the table corresponding to a given key.
@@ -134,9 +231,10 @@ class TemporaryTranspositionTable(object):
             The corresponding value.
         """
         state, depth_to_search = key
-        depth_searched, heuristic = self._table[state]
-        if depth_searched >= depth_to_search:
-            return heuristic
+        entry = self._find(state._chash)
+        if (entry is not None and entry[3] == EXACT and
+                entry[1] >= depth_to_search):
+            return entry[2]
         else:
             raise KeyError
 
@@ -148,35 +246,395 @@ class TemporaryTranspositionTable(object):
             value: Value.
         """
         state, depth_searched = key
-        self._table[state] = (depth_searched, value)
+        self.store(state, depth_searched, value, EXACT)
+
+    def _find(self, chash):
+        """Returns the entry stored under a canonical hash, if any.
+
+        Args:
+            chash: Canonical position hash.
+
+        Returns:
+            Entry tuple of (hash, depth searched, value, flag), or None.
+        """
+        slot = chash & (self.SLOTS - 1)
+        entry = self._depth_preferred[slot]
+        if entry is not None and entry[0] == chash:
+            return entry
+        entry = self._always[slot]
+        if entry is not None and entry[0] == chash:
+            return entry
+        return None
+
+    def probe(self, state):
+        """Returns the entry stored for a state regardless of depth.
+
+        Args:
+            state: Game state.
+
+        Returns:
+            Tuple of (depth searched, value, flag), or None if the state
+            has no entry.
+        """
+        entry = self._find(state._chash)
+        if entry is None:
+            return None
+        return (entry[1], entry[2], entry[3])
+
+    def store(self, state, depth_searched, value, flag):
+        """Stores a value along with its alpha-beta bound classification.
+
+        Args:
+            state: Game state.
+            depth_searched: Depth the state was searched to.
+            value: Value.
+            flag: One of EXACT, LOWER or UPPER.
+        """
+        chash = state._chash
+        slot = chash & (self.SLOTS - 1)
+        entry = (chash, depth_searched, value, flag)
+        resident = self._depth_preferred[slot]
+        if (resident is None or resident[0] == chash or
+                resident[1] <= depth_searched):
+            self._depth_preferred[slot] = entry
+        else:
+            self._always[slot] = entry
 
     def _update_heuristic(self, state, heuristic):
         """Updates the heuristic value in the table without updating the depth
         searched.
 
+        States whose entry has been evicted are skipped: the slots only
+        hold the most valuable residents, and a fresh entry would have no
+        searched depth to carry.
+
         Args:
             state: Game state.
             heuristic: Heuristic value.
         """
-        depth_searched, _ = self._table[state]
-        self._table[state] = (depth_searched, heuristic)
+        chash = state._chash
+        slot = chash & (self.SLOTS - 1)
+        for tier in (self._depth_preferred, self._always):
+            entry = tier[slot]
+            if entry is not None and entry[0] == chash:
+                tier[slot] = (chash, entry[1], heuristic, entry[3])
+                return
+
+    def bulk_update(self, updates):
+        """Updates a batch of heuristic values in one pass without updating
+        the depths searched.
+
+        Args:
+            updates: List of (game state, heuristic value) tuples.
+        """
+        for state, heuristic in updates:
+            self._update_heuristic(state, heuristic)
+
+    def flush(self):
+        """Pushes any buffered writes to the table's backing store.
+
+        Everything lives in memory already, so this is a no-op.
+        """
+        pass
+
+
+class SharedTranspositionTable(object):
+
+    """Transposition table in shared memory, usable across processes.
+
+    A fixed number of open-addressed slots holds (key, depth, heuristic)
+    entries indexed by the state's canonical Zobrist hash. Each slot is
+    three 64-bit words: the searched depth with the bound flag packed in
+    its upper half, the heuristic bits, and the key XOR-ed with both, so
+    a reader that races a writer sees a mismatched key and treats the
+    slot as a miss instead of taking a lock. Deeper searches evict
+    shallower ones.
+    """
+
+    SLOTS = 1 << 20
+
+    def __init__(self, name=None):
+        """Constructs a SharedTranspositionTable.
+
+        Args:
+            name: Name of an existing table's shared memory block to
+                attach to. A new zero-filled block is allocated if none.
+        """
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True,
+                                                   size=self.SLOTS * 24)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self._words = self._shm.buf.cast('Q')
+
+    @property
+    def name(self):
+        """Name of the underlying shared memory block."""
+        return self._shm.name
+
+    def __contains__(self, key):
+        """Returns whether a key is contained in the table or not.
+
+        Args:
+            key: Key.
+
+        Returns:
+            Whether the key is stored in the table or not.
+        """
+        state, depth_to_search = key
+        entry = self.probe(state)
+        return (entry is not None and entry[2] == EXACT and
+                entry[0] >= depth_to_search)
+
+    def __getitem__(self, key):
+        """Returns the value in the table corresponding to a given key.
+
+        Args:
+            key: Key.
+
+        Returns:
+            The corresponding value.
+        """
+        state, depth_to_search = key
+        zkey = state._chash & 0xFFFFFFFFFFFFFFFF
+        words = self._words
+        base = (zkey & (self.SLOTS - 1)) * 3
+        meta = words[base]
+        heuristic_bits = words[base + 1]
+        if words[base + 2] ^ meta ^ heuristic_bits != zkey:
+            raise KeyError
+        if meta >> 32 != EXACT or meta & 0xFFFFFFFF < depth_to_search:
+            raise KeyError
+        return struct.unpack("<d", heuristic_bits.to_bytes(8, "little"))[0]
+
+    def __setitem__(self, key, value):
+        """Sets value in the table to given key.
+
+        Args:
+            key: Key.
+            value: Value.
+        """
+        state, depth_searched = key
+        self.store(state, depth_searched, value, EXACT)
+
+    def probe(self, state):
+        """Returns the entry stored for a state regardless of depth.
+
+        Args:
+            state: Game state.
+
+        Returns:
+            Tuple of (depth searched, value, flag), or None if the state
+            has no entry.
+        """
+        zkey = state._chash & 0xFFFFFFFFFFFFFFFF
+        words = self._words
+        base = (zkey & (self.SLOTS - 1)) * 3
+        meta = words[base]
+        heuristic_bits = words[base + 1]
+        if words[base + 2] ^ meta ^ heuristic_bits != zkey:
+            return None
+        value = struct.unpack("<d", heuristic_bits.to_bytes(8, "little"))[0]
+        return (meta & 0xFFFFFFFF, value, meta >> 32)
+
+    def store(self, state, depth_searched, value, flag):
+        """Stores a value along with its alpha-beta bound classification.
+
+        Args:
+            state: Game state.
+            depth_searched: Depth the state was searched to.
+            value: Value.
+            flag: One of EXACT, LOWER or UPPER.
+        """
+        zkey = state._chash & 0xFFFFFFFFFFFFFFFF
+        words = self._words
+        base = (zkey & (self.SLOTS - 1)) * 3
+
+        # Keep the deeper analysis if the slot already holds this state.
+        if (words[base + 2] ^ words[base] ^ words[base + 1] == zkey and
+                words[base] & 0xFFFFFFFF > depth_searched):
+            return
+
+        meta = depth_searched | flag << 32
+        heuristic_bits = int.from_bytes(struct.pack("<d", value), "little")
+        words[base] = meta
+        words[base + 1] = heuristic_bits
+        words[base + 2] = zkey ^ meta ^ heuristic_bits
+
+    def _update_heuristic(self, state, heuristic):
+        """Updates the heuristic value in the table without updating the depth
+        searched.
+
+        States whose entry has been evicted are skipped, as in the
+        in-memory table.
+
+        Args:
+            state: Game state.
+            heuristic: Heuristic value.
+        """
+        zkey = state._chash & 0xFFFFFFFFFFFFFFFF
+        words = self._words
+        base = (zkey & (self.SLOTS - 1)) * 3
+        meta = words[base]
+        if words[base + 2] ^ meta ^ words[base + 1] != zkey:
+            return
+        heuristic_bits = int.from_bytes(struct.pack("<d", heuristic),
+                                        "little")
+        words[base + 1] = heuristic_bits
+        words[base + 2] = zkey ^ meta ^ heuristic_bits
+
+    def bulk_update(self, updates):
+        """Updates a batch of heuristic values in one pass without updating
+        the depths searched.
+
+        Args:
+            updates: List of (game state, heuristic value) tuples.
+        """
+        for state, heuristic in updates:
+            self._update_heuristic(state, heuristic)
+
+    def flush(self):
+        """Pushes any buffered writes to the table's backing store.
+
+        Writes land in the shared memory block directly, so this is a
+        no-op.
+        """
+        pass
+
+    def close(self):
+        """Releases the shared memory block, unlinking it if owned."""
+        self._words.release()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+# SQL for the database-backed table, defined once so every call binds
+# positional parameters against the same prepared statement instead of
+# rebuilding a parameter dict per operation. Rows are keyed by the
+# packed position directly: a single-column primary key means one
+# memcmp per B-tree step, and WITHOUT ROWID stores the row in the key's
+# B-tree with no secondary rowid fetch.
+_SELECT_HEURISTIC_SQL = """
+SELECT heuristic FROM transposition_table
+    WHERE position=? AND depth_searched>=?;
+"""
+
+_EXISTS_SQL = """
+SELECT 1 FROM transposition_table
+    WHERE position=? AND depth_searched>=?
+    LIMIT 1;
+"""
+
+_SELECT_ENTRY_SQL = """
+SELECT depth_searched, heuristic FROM transposition_table
+    WHERE position=?;
+"""
+
+_UPSERT_SQL = """
+INSERT INTO transposition_table
+    (position, depth_searched, heuristic)
+    VALUES (?, ?, ?)
+    ON CONFLICT (position) DO UPDATE
+    SET
+        depth_searched=excluded.depth_searched,
+        heuristic=excluded.heuristic
+    WHERE excluded.depth_searched>=depth_searched;
+"""
+
+_UPDATE_HEURISTIC_SQL = """
+UPDATE transposition_table
+    SET heuristic=?
+    WHERE position=?;
+"""
+
+
+def _flush_and_close(conn, lock, dirty):
+    """Pushes a table's remaining buffered rows and closes its connection.
+
+    Registered as a table's finalizer, so it takes the connection, lock
+    and buffer directly rather than the table: a reference to the table
+    itself would pin it (and its caches) for the life of the process.
+
+    Args:
+        conn: Database connection.
+        lock: Lock serializing access to the connection.
+        dirty: Buffered rows keyed by packed position.
+    """
+    with lock:
+        if dirty:
+            conn.executemany(_UPSERT_SQL,
+                             [(position,) + entry
+                              for position, entry in dirty.items()])
+            conn.commit()
+            dirty.clear()
+        conn.close()
+
+
+def _pack_position(white_pieces, black_pieces, turn):
+    """Packs a position into the fixed-width key rows are indexed by.
+
+    The large board's bitboards are 42 bits each, so the pieces and the
+    turn don't fit a single 64-bit SQLite integer; a 17-byte blob keeps
+    the key a single column regardless of board size.
+
+    Args:
+        white_pieces: White pieces as an int.
+        black_pieces: Black pieces as an int.
+        turn: Turn player's value.
+
+    Returns:
+        Position key as bytes.
+    """
+    return struct.pack("<QQB", white_pieces, black_pieces, turn)
 
 
 class PermanentTranspositionTable(object):
 
-    """Transposition table stored in database."""
+    """Transposition table stored in database.
+
+    Writes are buffered in memory and pushed to the database in a single
+    transaction per flush() instead of paying a commit per stored node.
+    Reads go through the in-memory cache, which also covers anything not
+    yet flushed.
+    """
 
-    def __init__(self, filename):
+    def __init__(self, filename, board_class=None):
         """Constructs a PermanentTranspositionTable.
 
         Args:
             filename: Filename of SQLite database.
+            board_class: Board class the stored positions belong to. If
+                given, the whole table is streamed into the in-memory
+                cache at construction so reads skip per-row SELECTs.
         """
         self._lock = Lock()
-        self._conn = sqlite3.connect(filename)
+
+        # Access is serialized by the lock, so the connection can be
+        # shared across threads safely. The statement cache is sized so
+        # none of the module's statements ever gets re-prepared.
+        self._conn = sqlite3.connect(filename, check_same_thread=False,
+                                     cached_statements=256)
         self._cache = TemporaryTranspositionTable()
+
+        # Rows waiting to be flushed, keyed by position so a rewritten
+        # entry costs one upsert instead of two.
+        self._dirty = {}
         self.__setup()
 
+        # The buffer only reaches the database on flush(), so push it
+        # when the table is collected or the interpreter exits, in case
+        # the last batch never got one. A finalizer rather than atexit
+        # keeps a table that is simply dropped collectable.
+        self._finalizer = weakref.finalize(self, _flush_and_close,
+                                           self._conn, self._lock,
+                                           self._dirty)
+
+        if board_class is not None:
+            self.__preload(board_class)
+
     def __contains__(self, key):
         """Returns whether a key is contained in the table or not.
 
@@ -186,11 +644,21 @@ class PermanentTranspositionTable(object):
         Returns:
             Whether the key is stored in the table or not.
         """
-        try:
-            self[key]
+        if key in self._cache:
+            return True
+
+        state, depth_to_search = key
+        position = _pack_position(state._white_pieces, state._black_pieces,
+                                  state.turn.value)
+        with self._lock:
+            buffered = self._dirty.get(position)
+        if buffered is not None and buffered[0] >= depth_to_search:
             return True
-        except KeyError:
-            return False
+
+        with self._lock:
+            result = self._conn.execute(
+                _EXISTS_SQL, (position, depth_to_search)).fetchone()
+        return result is not None
 
     def __getitem__(self, key):
         """Returns the value in the table corresponding to a given key.
@@ -205,26 +673,19 @@ class PermanentTranspositionTable(object):
             return self._cache[key]
 
         state, depth_searched = key
-        s = """
-        SELECT heuristic FROM transposition_table
-            WHERE
-                white_pieces=:white AND
-                black_pieces=:black AND
-                turn=:turn AND
-                depth_searched>=:depth;
-        """
-        parameters = {
-            "white": state.board._white_pieces,
-            "black": state.board._black_pieces,
-            "turn": state.turn.value,
-            "depth": depth_searched
-        }
 
-        c = self._conn.cursor()
+        # The row may be waiting in the write buffer after the bounded
+        # cache evicted it.
+        position = _pack_position(state._white_pieces, state._black_pieces,
+                                  state.turn.value)
         with self._lock:
-            c.execute(s, parameters)
-            result = c.fetchone()
-            c.close()
+            buffered = self._dirty.get(position)
+        if buffered is not None and buffered[0] >= depth_searched:
+            return buffered[1]
+
+        with self._lock:
+            result = self._conn.execute(
+                _SELECT_HEURISTIC_SQL, (position, depth_searched)).fetchone()
 
         if result is None:
             raise KeyError
@@ -240,45 +701,88 @@ class PermanentTranspositionTable(object):
             key: Game state.
             value: Value.
         """
-        self._cache[key] = value
         state, depth_searched = key
 
-        c = self._conn.cursor()
-        parameters = {
-            "white": state.board._white_pieces,
-            "black": state.board._black_pieces,
-            "turn": state.turn.value,
-            "depth": depth_searched,
-            "heuristic": value
-        }
-
-        update = """
-        UPDATE transposition_table
-            SET
-                depth_searched=:depth,
-                heuristic=:heuristic
-            WHERE
-                white_pieces=:white AND
-                black_pieces=:black AND
-                turn=:turn;
-        """
-
-        insert = """
-        INSERT INTO transposition_table
-            (white_pieces, black_pieces, turn, depth_searched, heuristic)
-            SELECT :white, :black, :turn, :depth, :heuristic
-            WHERE (SELECT CHANGES()=0);
-        """
+        # Re-searching a transposition often lands on the entry already
+        # held; rewriting it would only dirty a row that is either on
+        # disk or in the buffer with the same contents.
+        entry = self._cache.probe(state)
+        if (entry is not None and entry[0] == depth_searched and
+                entry[1] == value and entry[2] == EXACT):
+            return
 
+        self._cache[key] = value
+        position = _pack_position(state._white_pieces, state._black_pieces,
+                                  state.turn.value)
         with self._lock:
-            # Update existing item if exists.
-            c.execute(update, parameters)
+            self._dirty[position] = (depth_searched, value)
 
-            # Insert if no update occurred.
-            c.execute(insert, parameters)
+    def flush(self):
+        """Pushes any buffered writes to the database.
+
+        The whole buffer is upserted in one transaction, so the cost of a
+        durable commit is paid once per flush instead of once per stored
+        node.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            parameters = [(position,) + entry
+                          for position, entry in self._dirty.items()]
+            self._dirty.clear()
 
+            self._conn.executemany(_UPSERT_SQL, parameters)
             self._conn.commit()
-            c.close()
+
+    def probe(self, state):
+        """Returns the entry stored for a state regardless of depth.
+
+        Args:
+            state: Game state.
+
+        Returns:
+            Tuple of (depth searched, value, flag), or None if the state
+            has no entry.
+        """
+        entry = self._cache.probe(state)
+        if entry is not None:
+            return entry
+
+        # The row may be waiting in the write buffer after the bounded
+        # cache evicted it.
+        position = _pack_position(state._white_pieces, state._black_pieces,
+                                  state.turn.value)
+        with self._lock:
+            buffered = self._dirty.get(position)
+        if buffered is not None:
+            return (buffered[0], buffered[1], EXACT)
+
+        with self._lock:
+            result = self._conn.execute(_SELECT_ENTRY_SQL,
+                                        (position,)).fetchone()
+
+        if result is None:
+            return None
+
+        # Only exact values are ever persisted.
+        return (result[0], result[1], EXACT)
+
+    def store(self, state, depth_searched, value, flag):
+        """Stores a value along with its alpha-beta bound classification.
+
+        Bounds only hold relative to the search window that produced them,
+        so they stay in the in-memory cache; exact values are persisted.
+
+        Args:
+            state: Game state.
+            depth_searched: Depth the state was searched to.
+            value: Value.
+            flag: One of EXACT, LOWER or UPPER.
+        """
+        if flag == EXACT:
+            self[(state, depth_searched)] = value
+        else:
+            self._cache.store(state, depth_searched, value, flag)
 
     def _update_heuristic(self, state, heuristic):
         """Updates the heuristic value in the table without updating the depth
@@ -288,33 +792,112 @@ class PermanentTranspositionTable(object):
             state: Game state.
             heuristic: Heuristic value.
         """
+        # Re-scoring a fully-searched subtree usually reproduces the
+        # stored value; the heuristic is a REAL, so equality is taken up
+        # to rounding. Unchanged values skip the write and its commit.
+        entry = self._cache.probe(state)
+        if entry is not None and (entry[1] == heuristic or
+                                  abs(entry[1] - heuristic) < 1e-9):
+            return
+
         self._cache._update_heuristic(state, heuristic)
 
-        c = self._conn.cursor()
-        parameters = {
-            "white": state.board._white_pieces,
-            "black": state.board._black_pieces,
-            "turn": state.turn.value,
-            "heuristic": heuristic
-        }
-
-        update = """
-        UPDATE transposition_table
-            SET
-                heuristic=:heuristic
-            WHERE
-                white_pieces=:white AND
-                black_pieces=:black AND
-                turn=:turn;
+        # The row being updated may still be sitting in the buffer.
+        self.flush()
+
+        with self._lock:
+            self._conn.execute(_UPDATE_HEURISTIC_SQL,
+                               (heuristic,
+                                _pack_position(state._white_pieces,
+                                               state._black_pieces,
+                                               state.turn.value)))
+            self._conn.commit()
+
+    def bulk_update(self, updates):
+        """Updates a batch of heuristic values in one pass without updating
+        the depths searched.
+
+        The whole batch is applied under a single lock acquisition and
+        committed once instead of per update.
+
+        Args:
+            updates: List of (game state, heuristic value) tuples.
         """
+        # Drop updates that reproduce the stored value up to rounding;
+        # they would rewrite rows with identical contents.
+        changed = []
+        for state, heuristic in updates:
+            entry = self._cache.probe(state)
+            if entry is not None and (entry[1] == heuristic or
+                                      abs(entry[1] - heuristic) < 1e-9):
+                continue
+            changed.append((state, heuristic))
+        updates = changed
+        if not updates:
+            return
+
+        self._cache.bulk_update(updates)
+
+        # Rows being updated may still be sitting in the buffer.
+        self.flush()
+
+        parameters = [(heuristic,
+                       _pack_position(state._white_pieces,
+                                      state._black_pieces,
+                                      state.turn.value))
+                      for state, heuristic in updates]
 
         with self._lock:
-            c.execute(update, parameters)
+            self._conn.executemany(_UPDATE_HEURISTIC_SQL, parameters)
             self._conn.commit()
-            c.close()
+
+    def close(self):
+        """Flushes buffered writes and closes the database.
+
+        Runs PRAGMA optimize first so collected query statistics are
+        folded into the database while the connection is idle anyway.
+        """
+        self.flush()
+        with self._lock:
+            self._conn.execute("PRAGMA optimize;")
+
+        # Runs the finalizer now and marks it dead, closing the
+        # connection exactly once.
+        self._finalizer()
+
+    def __preload(self, board_class):
+        """Streams the whole table into the in-memory cache.
+
+        One sequential scan of the B-tree at startup is cheaper than the
+        point SELECTs it saves after even a few thousand cold reads. The
+        cache's fixed slots bound memory, so an oversized table simply
+        wraps around them and the overflow stays reachable on disk.
+
+        Args:
+            board_class: Board class the stored positions belong to.
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+            SELECT position, depth_searched, heuristic
+                FROM transposition_table;
+            """).fetchall()
+
+        store = self._cache.store
+        for position, depth_searched, heuristic in rows:
+            white_pieces, black_pieces, turn = struct.unpack("<QQB",
+                                                             position)
+            state = GameState(board_class(white_pieces, black_pieces),
+                              Player(turn))
+            store(state, depth_searched, heuristic, EXACT)
 
     def __setup(self):
-        """Sets up the database if it doesn't exist yet."""
+        """Sets up the database if it doesn't exist yet.
+
+        Databases from before the packed-key layout are migrated in
+        place: their rows are re-keyed and the AUTOINCREMENT id column —
+        whose sqlite_sequence bookkeeping cost a metadata write per
+        insert — is dropped along with the three-column position index.
+        """
         c = self._conn.cursor()
 
         check_command = """
@@ -323,21 +906,58 @@ class PermanentTranspositionTable(object):
             WHERE type='table' AND name='transposition_table';
         """
 
+        creation_command = """
+        CREATE TABLE transposition_table
+            (position BLOB PRIMARY KEY,
+             depth_searched INTEGER,
+             heuristic REAL)
+            WITHOUT ROWID;
+        """
+
         with self._lock:
+            # Larger pages mean a shallower B-tree and fewer reads per
+            # lookup. The pragma only takes effect when the database is
+            # created, so it must run before the table does; existing
+            # databases keep whatever page size they were built with.
+            c.execute("PRAGMA page_size=8192;")
+
+            # Batch commits tolerate relaxed durability: a torn tail of
+            # cached search results is rediscoverable work, not data
+            # loss.
+            c.execute("PRAGMA journal_mode=WAL;")
+            c.execute("PRAGMA synchronous=NORMAL;")
+            c.execute("PRAGMA temp_store=MEMORY;")
+
+            # Memory-mapped reads come out of the OS page cache without
+            # a syscall per B-tree page; the map size is an upper bound,
+            # not an allocation. 64 MiB of page cache on top keeps the
+            # hot pages resident, and the busy timeout rides out a
+            # concurrent writer instead of failing outright.
+            c.execute("PRAGMA mmap_size=1073741824;")
+            c.execute("PRAGMA cache_size=-65536;")
+            c.execute("PRAGMA busy_timeout=5000;")
+
             c.execute(check_command)
             created = c.fetchone()
 
             if not created:
-                creation_command = """
-                CREATE TABLE transposition_table
-                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                     white_pieces INTEGER NOT NULL,
-                     black_pieces INTEGER NOT NULL,
-                     turn INTEGER NOT NULL,
-                     depth_searched INTEGER,
-                     heuristic REAL);
-                """
                 c.execute(creation_command)
-                self._conn.commit()
+            else:
+                c.execute("PRAGMA table_info(transposition_table);")
+                columns = [row[1] for row in c.fetchall()]
+                if "position" not in columns:
+                    rows = c.execute("""
+                    SELECT white_pieces, black_pieces, turn,
+                           depth_searched, heuristic
+                        FROM transposition_table;
+                    """).fetchall()
+                    c.execute("DROP TABLE transposition_table;")
+                    c.execute(creation_command)
+                    c.executemany(
+                        _UPSERT_SQL,
+                        [(_pack_position(white, black, turn), depth,
+                          heuristic)
+                         for white, black, turn, depth, heuristic in rows])
 
+            self._conn.commit()
             c.close()